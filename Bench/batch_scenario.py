@@ -0,0 +1,80 @@
+"""
+Cost of a multi-instruction scenario: sequential /ask-agent calls vs one /ask-agent/batch.
+
+Runs offline against the same stand-ins as Bench.benchmark (stub LLM, RSS fixtures,
+fake Calendar/Gmail, Hue mock), with the LLM cache, prefetch and coalescing disabled
+so both variants do the full work. Reports wall time and LLM calls of each variant.
+
+Usage (from the repository root):
+    python -m Bench.batch_scenario --rounds 5
+"""
+import argparse
+import os
+import statistics
+import time
+
+import requests
+
+from Bench.benchmark import API_PORT, STUB_PORT, start_api
+from Bench.stubs import StubBackendHandler, start_stub_backend
+
+# Dashboard-style scenarios: several instructions sent together
+SCENARIOS = {
+    "arrivee": [
+        "Je suis rentré, allume le salon.",
+        "Quel temps fait-il aujourd'hui ?",
+        "Peux-tu me résumer mes nouveaux emails ?",
+    ],
+    "matinale": [
+        "Quel temps fait-il aujourd'hui ?",
+        "Mon calendrier  ?",
+        "Fais-moi une compilation des dernières actualités mondiales.",
+    ],
+}
+
+
+def timed(call):
+    calls_before = StubBackendHandler.llm_calls
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000, StubBackendHandler.llm_calls - calls_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Stub LLM fixed latency per call (s)")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="Stub RSS/Open-Meteo latency (s)")
+    args = parser.parse_args()
+
+    os.environ["LLM_URL"] = f"http://127.0.0.1:{STUB_PORT}/v1"
+    os.environ["HUE_SIMULATION"] = "1"
+    os.environ["GMAIL_CACHE_FILE"] = ""
+    os.environ["HEADLINE_DB"] = ""
+    os.environ.pop("PENDING_ACTION_DB", None)
+    os.environ["LLM_CACHE"] = "0"
+    os.environ["PREFETCH"] = "0"
+    os.environ["COALESCING"] = "0"
+    start_stub_backend(STUB_PORT, args.llm_latency, http_latency=args.http_latency)
+    start_api()
+
+    base = f"http://127.0.0.1:{API_PORT}"
+    session = requests.Session()
+    print(f"{'scenario':<12} {'variant':<12} {'p50 ms':>9} {'mean ms':>9} {'llm calls':>10}")
+    for name, instructions in SCENARIOS.items():
+        def sequential():
+            for instruction in instructions:
+                session.post(f"{base}/ask-agent", json={"instruction": instruction}, timeout=300).raise_for_status()
+
+        def batch():
+            session.post(f"{base}/ask-agent/batch", json={"instructions": instructions}, timeout=300).raise_for_status()
+
+        for variant, call in (("sequential", sequential), ("batch", batch)):
+            samples = [timed(call) for _ in range(args.rounds)]
+            ms = [s[0] for s in samples]
+            print(f"{name:<12} {variant:<12} {statistics.median(ms):>9.1f} {statistics.mean(ms):>9.1f} "
+                  f"{samples[-1][1]:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Offline end-to-end benchmark of the /ask-agent pipeline.
+
+Runs the FastAPI app against local stand-ins only (stub LLM with scripted tool
+calls, recorded RSS fixtures, fake Calendar/Gmail, stub Open-Meteo, Hue mock),
+replays the Dashboard quick-action prompts at the requested concurrency and
+reports throughput plus p50/p95/p99 per route and per pipeline stage.
+
+Usage (from the repository root):
+    python -m Bench.benchmark --concurrency 8 --rounds 10 --output bench_results.json
+
+The JSON output is meant to be diffed between commits: a regression in routing,
+tools or caching shows up as a change in those numbers.
+"""
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from Bench.stubs import StubBackendHandler, install_offline_backends, start_stub_backend
+
+STUB_PORT = 18235
+API_PORT = 18001
+
+# Prompts sent by the Dashboard quick actions (Src/Dashboard.py)
+QUICK_ACTIONS = {
+    "revue_de_presse": "Fais-moi une compilation des dernières actualités mondiales.",
+    "mon_calendrier": "Mon calendrier  ?",
+    "resume_des_mails": "Peux-tu me résumer mes nouveaux emails ?",
+    "meteo_locale": "Quel temps fait-il aujourd'hui ?",
+    "arrivee_mode_nuit": "Je suis rentré, allume le salon.",
+    "depart_securite": "Je pars, éteins toutes les lumières.",
+}
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(values)
+
+    def pick(pct):
+        return round(ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))], 2)
+
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99)}
+
+
+def start_api():
+    import uvicorn  # pyright: ignore[reportMissingImports]
+    from Src.Main import app
+
+    install_offline_backends(STUB_PORT)
+    config = uvicorn.Config(app, host="127.0.0.1", port=API_PORT, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def replay(routes, concurrency, rounds):
+    """Sends every route `rounds` times with `concurrency` clients; returns raw samples."""
+    url = f"http://127.0.0.1:{API_PORT}/ask-agent"
+    session = requests.Session()
+    jobs = [(name, prompt) for _ in range(rounds) for name, prompt in routes.items()]
+
+    def one_request(job):
+        name, prompt = job
+        start = time.perf_counter()
+        try:
+            response = session.post(url, json={"instruction": prompt, "timings": True}, timeout=300)
+            response.raise_for_status()
+            data = response.json()
+            return name, (time.perf_counter() - start) * 1000, data.get("timings", []), None
+        except Exception as e:
+            return name, (time.perf_counter() - start) * 1000, [], str(e)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one_request, jobs))
+
+
+def summarize(samples, elapsed):
+    per_route = defaultdict(list)
+    per_stage = defaultdict(list)
+    errors = defaultdict(int)
+    for name, ms, timings, error in samples:
+        if error:
+            errors[name] += 1
+            continue
+        per_route[name].append(ms)
+        for t in timings:
+            label = "/".join(str(v) for k, v in t.items() if k != "ms" and v)
+            per_stage[label].append(t["ms"])
+
+    return {
+        "requests": len(samples),
+        "errors": sum(errors.values()),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "llm_calls": StubBackendHandler.llm_calls,
+        "routes": {
+            name: {"count": len(values), "errors": errors.get(name, 0), **percentiles(values)}
+            for name, values in sorted(per_route.items())
+        },
+        "stages": {
+            label: {"count": len(values), **percentiles(values)}
+            for label, values in sorted(per_stage.items())
+        },
+    }
+
+
+def print_report(report):
+    print(f"requests={report['requests']} errors={report['errors']} "
+          f"throughput={report['throughput_rps']} req/s llm_calls={report['llm_calls']}")
+    for section in ("routes", "stages"):
+        print(f"\n{section[:-1]:<48} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for label, row in report[section].items():
+            print(f"{label:<48} {row['count']:>5} {row['p50']:>9} {row['p95']:>9} {row['p99']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5, help="Times each quick action is replayed")
+    parser.add_argument("--routes", nargs="+", choices=sorted(QUICK_ACTIONS), help="Subset of quick actions")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Stub LLM fixed latency per call (s)")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Stub LLM latency per generated word (s)")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="Stub RSS/Open-Meteo latency (s)")
+    parser.add_argument("--script", help="JSON file replacing the stub LLM script (see Bench/stubs.py)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Disable the LLM result cache")
+    parser.add_argument("--no-prompt-budget", action="store_true", help="Paste raw tool output into summary prompts")
+    parser.add_argument("--no-coalescing", action="store_true", help="Run identical concurrent requests separately")
+    parser.add_argument("--prefetch", action="store_true", help="Keep the background prefetch of quick-action answers")
+    parser.add_argument("--output", help="Write the machine-readable report to this JSON file")
+    args = parser.parse_args()
+
+    # Environment must be set before Src is imported
+    os.environ["LLM_URL"] = f"http://127.0.0.1:{STUB_PORT}/v1"
+    os.environ["HUE_SIMULATION"] = "1"
+    os.environ["GMAIL_CACHE_FILE"] = ""
+    os.environ["HEADLINE_DB"] = ""
+    os.environ.pop("PENDING_ACTION_DB", None)
+    if args.no_llm_cache:
+        os.environ["LLM_CACHE"] = "0"
+    if args.no_prompt_budget:
+        os.environ["PROMPT_BUDGET"] = "0"
+    if args.no_coalescing:
+        os.environ["COALESCING"] = "0"
+    # Precomputed answers would hide the pipeline being measured
+    os.environ["PREFETCH"] = "1" if args.prefetch else "0"
+
+    script = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    start_stub_backend(STUB_PORT, args.llm_latency, args.token_latency, args.http_latency, script)
+    start_api()
+
+    routes = {name: QUICK_ACTIONS[name] for name in (args.routes or QUICK_ACTIONS)}
+    start = time.perf_counter()
+    samples = replay(routes, args.concurrency, args.rounds)
+    report = summarize(samples, time.perf_counter() - start)
+    report["config"] = {
+        "concurrency": args.concurrency,
+        "rounds": args.rounds,
+        "llm_latency": args.llm_latency,
+        "token_latency": args.token_latency,
+        "http_latency": args.http_latency,
+        "llm_cache": not args.no_llm_cache,
+        "prompt_budget": not args.no_prompt_budget,
+        "coalescing": not args.no_coalescing,
+        "prefetch": args.prefetch,
+        "python": platform.python_version(),
+    }
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Cold-start profile of the backend.
+
+1. Runs `python -X importtime -c "import Src.Main"` in a fresh interpreter and
+   reports the total import time and the slowest top-level imports.
+2. Checks that heavy dependencies are NOT imported eagerly (they must load on
+   first use or in the background warm-up).
+3. Starts uvicorn in a subprocess and measures the time until /health answers.
+
+Usage (from the repository root):
+    python -m Bench.import_profile --max-import-ms 1500 --max-startup-ms 4000
+
+Exits with status 1 when a budget is exceeded or a lazy dependency is imported
+at module load, so CI can gate on it.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Must only be imported on first use / warm-up, never by `import Src.Main`.
+# langchain_core stays eager on purpose: the @tool decorators of Src.Tools build the
+# tool schemas at import, and it pulls in no network client (langchain_openai does).
+LAZY_MODULES = [
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "google.oauth2",
+    "feedparser",
+    "phue",
+    "langchain_openai",
+    "openai",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports():
+    """Returns [(module, self_us, cumulative_us, depth)] for `import Src.Main`."""
+    env = dict(os.environ, WARM_UP="0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import Src.Main"],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import Src.Main failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_startup(timeout=60):
+    """Milliseconds from process spawn until GET /health returns 200."""
+    port = free_port()
+    env = dict(os.environ, WARM_UP="0")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "Src.Main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError("the API did not answer /health in time")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if `import Src.Main` takes longer")
+    parser.add_argument("--max-startup-ms", type=float, help="Fail if /health takes longer to answer")
+    parser.add_argument("--skip-startup", action="store_true", help="Only profile imports")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    rows = profile_imports()
+    main_row = next((r for r in rows if r[0] == "Src.Main"), None)
+    import_ms = main_row[2] / 1000 if main_row else sum(r[1] for r in rows) / 1000
+    eager = sorted({m for m, *_ in rows for lazy in LAZY_MODULES if m == lazy or m.startswith(lazy + ".")})
+    top_level = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)[:args.top]
+
+    report = {
+        "import_ms": round(import_ms, 1),
+        "slowest_imports": [{"module": m, "cumulative_ms": round(c / 1000, 1)} for m, _, c, _ in top_level],
+        "eager_lazy_modules": eager,
+    }
+    if not args.skip_startup:
+        report["startup_to_first_response_ms"] = round(measure_startup(), 1)
+
+    print(f"import Src.Main: {report['import_ms']} ms")
+    for row in report["slowest_imports"]:
+        print(f"  {row['module']:<40} {row['cumulative_ms']:>8} ms")
+    if "startup_to_first_response_ms" in report:
+        print(f"startup to first /health response: {report['startup_to_first_response_ms']} ms")
+
+    failures = []
+    if eager:
+        failures.append(f"imported at module load instead of lazily: {', '.join(eager)}")
+    if args.max_import_ms and report["import_ms"] > args.max_import_ms:
+        failures.append(f"import time {report['import_ms']} ms > {args.max_import_ms} ms")
+    if args.max_startup_ms and report.get("startup_to_first_response_ms", 0) > args.max_startup_ms:
+        failures.append(f"startup {report['startup_to_first_response_ms']} ms > {args.max_startup_ms} ms")
+    report["failures"] = failures
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
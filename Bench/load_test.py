@@ -0,0 +1,91 @@
+"""
+Load test for the /ask-agent route.
+
+Starts the stub OpenAI-compatible server (fixed generation latency), points the
+FastAPI backend at it through LLM_URL, then fires the same instruction with
+1, 8 and 32 concurrent clients and prints p50/p99 latencies.
+
+Usage (from the repository root):
+    python -m Bench.load_test --latency 0.5 --requests 64
+
+With --backends N, N stub servers are started and LLM_URL lists them all, to
+measure the throughput gained by the LLM backend pool.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from Bench.stubs import start_stub_backend
+
+STUB_PORT = 18234
+API_PORT = 18000
+
+
+def start_api():
+    import uvicorn  # pyright: ignore[reportMissingImports]
+    from Src.Main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=API_PORT, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def run_clients(concurrency, total, instruction):
+    """Sends `total` requests with `concurrency` parallel clients, returns latencies in seconds."""
+    url = f"http://127.0.0.1:{API_PORT}/ask-agent"
+
+    def one_request(_):
+        start = time.perf_counter()
+        requests.post(url, json={"instruction": instruction}, timeout=300).raise_for_status()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one_request, range(total)))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub LLM generation latency (s)")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--instruction", default="Bonjour, comment vas-tu ?")
+    parser.add_argument("--backends", type=int, default=1, help="Number of stub LLM servers in the pool")
+    args = parser.parse_args()
+
+    ports = [STUB_PORT + i for i in range(args.backends)]
+    os.environ["LLM_URL"] = ",".join(f"http://127.0.0.1:{port}/v1" for port in ports)
+    # Identical prompts would otherwise be answered by the LLM result cache
+    os.environ["LLM_CACHE"] = "0"
+    os.environ["PREFETCH"] = "0"
+    # The same instruction is sent concurrently: it must not be merged into one run
+    os.environ["COALESCING"] = "0"
+    for port in ports:
+        start_stub_backend(port, llm_latency=args.latency)
+    start_api()
+
+    print(f"{'clients':>8} {'p50 (s)':>9} {'p99 (s)':>9} {'mean (s)':>9} {'req/s':>8}")
+    for concurrency in args.concurrency:
+        total = max(args.requests, concurrency)
+        start = time.perf_counter()
+        latencies = run_clients(concurrency, total, args.instruction)
+        elapsed = time.perf_counter() - start
+        print(f"{concurrency:>8} {percentile(latencies, 50):>9.3f} {percentile(latencies, 99):>9.3f} "
+              f"{statistics.mean(latencies):>9.3f} {total / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
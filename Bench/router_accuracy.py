@@ -0,0 +1,45 @@
+"""
+Accuracy of the fast-path intent classifier on the labelled router set.
+
+Reports the share of requests routed locally (LLM router skipped), the accuracy
+of those local decisions, and lists every misrouted case.
+
+Usage (from the repository root):
+    python -m Bench.router_accuracy
+"""
+import json
+import os
+import sys
+
+from Src.Router import classify_intent
+
+CASES_FILE = os.path.join(os.path.dirname(__file__), "router_cases.json")
+
+
+def main():
+    with open(CASES_FILE, encoding="utf-8") as f:
+        cases = json.load(f)
+
+    skipped, correct, errors = 0, 0, []
+    for case in cases:
+        label, confidence = classify_intent(case["text"])
+        if label is None:
+            continue
+        skipped += 1
+        if label == case["label"]:
+            correct += 1
+        else:
+            errors.append((case["text"], case["label"], label, confidence))
+
+    print(f"cases:            {len(cases)}")
+    print(f"LLM skipped:      {skipped} ({skipped / len(cases):.0%})")
+    print(f"fast-path accuracy: {correct / skipped:.1%}" if skipped else "fast-path accuracy: n/a")
+    for text, expected, got, confidence in errors:
+        print(f"  MISROUTED {text!r}: expected {expected}, got {got} ({confidence})")
+
+    # Non-zero exit so CI can gate on fast-path misroutes
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
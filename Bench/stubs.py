@@ -0,0 +1,296 @@
+"""
+Local stand-ins for every external backend of the assistant.
+
+- StubBackendHandler: one HTTP server playing an OpenAI-compatible LLM
+  (/v1/chat/completions and /v1/models, scripted tool calls, configurable latency), the RSS
+  feeds (recorded XML fixtures, with ETag support) and Open-Meteo.
+- FakeGoogleServices: drop-in replacement for Src.GoogleAuth.google_services
+  returning fake Calendar/Gmail discovery clients.
+The Hue bridge needs no stub: the bench sets HUE_SIMULATION=1 so Src.Domotics
+sends the commands to its HueBridgeMock.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Feed key (Src.Tools.NEWS_FEEDS) -> recorded fixture
+RSS_FIXTURES = {
+    "MAIN_STREAM_1_POLITICS": "lemonde_politique.xml",
+    "MAIN_STREAM_1_INTL": "lemonde_intl.xml",
+    "MAIN_STREAM_2_POLITICS": "figaro_politique.xml",
+    "PUBLIC_SERVICE_POLITICS": "franceinfo_politique.xml",
+    "PUBLIC_SERVICE_INTL": "franceinfo_monde.xml",
+    "PUBLIC_SERVICE_ECO": "franceinfo_economie.xml",
+    "INSTITUTIONAL_SENATE": "senat_rapports.xml",
+}
+
+# Rules are tried in order; the first whose substrings all match the system prompt
+# and the user message answers. "tool_calls" produce an OpenAI tool-call response.
+DEFAULT_SCRIPT = [
+    {"system": "dispatcher", "user": "", "content": "GENERAL"},
+    {"system": "home automation", "user": "éteins", "tool_calls": [{"name": "control_lights", "args": {"location": "ALL", "action": "OFF"}}]},
+    {"system": "home automation", "user": "", "tool_calls": [{"name": "control_lights", "args": {"location": "LIVING_ROOM", "action": "ON"}}]},
+    {"system": "weather", "user": "", "tool_calls": [{"name": "get_weather_forecast", "args": {}}]},
+    {"system": "news aggregation", "user": "calendrier", "tool_calls": [{"name": "get_daily_calendar", "args": {}}]},
+    {"system": "news aggregation", "user": "mail", "tool_calls": [{"name": "summarize_recent_emails", "args": {}}]},
+    {"system": "news aggregation", "user": "", "tool_calls": [{"name": "compile_news_reports", "args": {}}]},
+    {"system": "", "user": "", "content": "Voici une synthèse simulée des informations demandées, générée par le serveur de test."},
+]
+
+
+class StubBackendHandler(BaseHTTPRequestHandler):
+    """Serves the stub LLM, RSS fixtures and Open-Meteo endpoints."""
+    llm_latency = 0.5        # fixed cost of one generation (s)
+    token_latency = 0.0      # additional cost per generated word (s)
+    http_latency = 0.0       # latency of RSS / weather answers (s)
+    script = DEFAULT_SCRIPT
+    llm_calls = 0
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # --- RSS and Open-Meteo ---
+
+    def do_GET(self):
+        time.sleep(self.http_latency)
+        path = self.path.split("?")[0]
+        if path.startswith("/rss/"):
+            fixture = os.path.join(FIXTURES_DIR, "rss", os.path.basename(path))
+            if not os.path.exists(fixture):
+                return self._send_json({"error": "not found"}, 404)
+            with open(fixture, "rb") as f:
+                body = f.read()
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/v1/models":
+            # Health check of the LLM backend pool
+            self._send_json({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        elif path == "/geocoding/search":
+            self._send_json({"results": [{"latitude": 45.19, "longitude": 5.72, "name": "Grenoble"}]})
+        elif path == "/forecast":
+            self._send_json({
+                "current_weather": {"temperature": 14.2},
+                "daily": {"temperature_2m_min": [8.1], "temperature_2m_max": [17.6]}
+            })
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    # --- OpenAI-compatible LLM ---
+
+    def _answer(self, body):
+        messages = body.get("messages", [])
+        system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "").lower()
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "").lower()
+        # Tools are only offered to agents that bind them
+        has_tools = bool(body.get("tools"))
+        for rule in self.script:
+            if rule["system"] in system and rule["user"] in user:
+                if rule.get("tool_calls") and not has_tools:
+                    continue
+                return rule
+        return {"content": "OK"}
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self._lock:
+            StubBackendHandler.llm_calls += 1
+        rule = self._answer(body)
+        content = rule.get("content")
+        words = (content or "").split(" ")
+        time.sleep(self.llm_latency + self.token_latency * len(words))
+
+        model = body.get("model", "stub")
+        if rule.get("tool_calls"):
+            tool_calls = [
+                {"id": f"call_{i}", "type": "function",
+                 "function": {"name": c["name"], "arguments": json.dumps(c["args"])}}
+                for i, c in enumerate(rule["tool_calls"])
+            ]
+            message = {"role": "assistant", "content": None, "tool_calls": tool_calls}
+            finish = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": content}
+            finish = "stop"
+        usage = {"prompt_tokens": sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4,
+                 "completion_tokens": len(words)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            if finish == "stop":
+                for i, word in enumerate(words):
+                    delta = {"role": "assistant", "content": word if i == 0 else " " + word}
+                    self._write_chunk(model, delta, None)
+            else:
+                for i, call in enumerate(message["tool_calls"]):
+                    self._write_chunk(model, {"role": "assistant", "tool_calls": [dict(call, index=i)]}, None)
+            self._write_chunk(model, {}, finish, usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        self._send_json({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+            "usage": usage
+        })
+
+    def _write_chunk(self, model, delta, finish_reason, usage=None):
+        chunk = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        if usage:
+            chunk["usage"] = usage
+        self.wfile.write(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+
+
+def start_stub_backend(port, llm_latency=0.5, token_latency=0.0, http_latency=0.0, script=None):
+    """Starts the stub server in a daemon thread and returns it."""
+    StubBackendHandler.llm_latency = llm_latency
+    StubBackendHandler.token_latency = token_latency
+    StubBackendHandler.http_latency = http_latency
+    StubBackendHandler.script = script or DEFAULT_SCRIPT
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubBackendHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- Fake Google Calendar / Gmail ---
+
+class FakeRequest:
+    """Mimics a googleapiclient HttpRequest: .execute() returns a canned result."""
+    def __init__(self, result, latency):
+        self.result = result
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return self.result
+
+
+class FakeBatch:
+    """Mimics BatchHttpRequest: one round trip for all the added requests."""
+    def __init__(self, callback, latency):
+        self.callback = callback
+        self.latency = latency
+        self.requests = []
+
+    def add(self, request):
+        self.requests.append(request)
+
+    def execute(self):
+        time.sleep(self.latency)
+        for i, request in enumerate(self.requests):
+            self.callback(str(i), request.result, None)
+
+
+class FakeResource:
+    """Attribute/call chain returning FakeRequests, e.g. service.users().messages().get(...)."""
+    def __init__(self, resolver, latency, path=()):
+        self._resolver = resolver
+        self._latency = latency
+        self._path = path
+
+    def __getattr__(self, name):
+        return FakeResource(self._resolver, self._latency, self._path + (name,))
+
+    def __call__(self, **kwargs):
+        result = self._resolver(self._path, kwargs)
+        if result is None:
+            # Intermediate resource such as users() or messages()
+            return self
+        return FakeRequest(result, self._latency)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback, self._latency)
+
+
+class FakeGoogleServices:
+    """Replacement for Src.GoogleAuth.google_services with canned Calendar/Gmail data."""
+    def __init__(self, latency=0.05, emails=20):
+        self.latency = latency
+        self.messages = [
+            {"id": f"m{i}", "snippet": f"Contenu simulé du message {i}.", "internalDate": str(1760600000000 - i * 60000),
+             "payload": {"headers": [{"name": "Subject", "value": f"Sujet {i}"}, {"name": "From", "value": "test@example.org"}]}}
+            for i in range(emails)
+        ]
+
+    def _resolve(self, path, kwargs):
+        name = path[-1] if path else ""
+        if path[-2:] == ("events", "list"):
+            return {"items": [
+                {"summary": "Réunion d'équipe", "start": {"dateTime": "2026-10-16T09:30:00+02:00"}},
+                {"summary": "Dentiste", "start": {"dateTime": "2026-10-16T17:00:00+02:00"}},
+            ]}
+        if path[-2:] == ("messages", "list"):
+            return {"messages": [{"id": m["id"]} for m in self.messages[:kwargs.get("maxResults", 5)]]}
+        if path[-2:] == ("messages", "get"):
+            return next(m for m in self.messages if m["id"] == kwargs["id"])
+        if name == "getProfile":
+            return {"historyId": "1000"}
+        if path[-2:] == ("history", "list"):
+            return {"history": [], "historyId": "1000"}
+        return None
+
+    @contextmanager
+    def client(self, service_name, version):
+        yield FakeResource(self._resolve, self.latency)
+
+    # Canned data: no OAuth flow to fear, background jobs may call it
+    authorized = True
+
+    def warm_up(self, *services):
+        pass
+
+
+def install_offline_backends(port, google_latency=0.05):
+    """
+    Points an already imported Src package at the stub backend.
+    Must be called after `import Src.Main` and before the first request.
+    """
+    import Src.Main as main
+    import Src.Tools as tools
+
+    base = f"http://127.0.0.1:{port}"
+    for key, fixture in RSS_FIXTURES.items():
+        tools.NEWS_FEEDS[key] = f"{base}/rss/{fixture}"
+    tools.GEOCODING_URL = f"{base}/geocoding/search"
+    tools.FORECAST_URL = f"{base}/forecast"
+
+    fake_google = FakeGoogleServices(latency=google_latency)
+    tools.google_services = fake_google
+    main.google_services = fake_google
+    return fake_google
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+# --- PENDING ACTIONS CONFIGURATION ---
+# Durée de validité d'une action en attente de confirmation (secondes)
+PENDING_ACTION_TTL = int(os.getenv("PENDING_ACTION_TTL", "300"))
+# Fichier SQLite partagé : obligatoire dès que uvicorn tourne avec plusieurs workers
+PENDING_ACTION_DB = os.getenv("PENDING_ACTION_DB")
+
+DEFAULT_SESSION = "default"
+
+class MemoryActionStore:
+    """
+    In-process store of tool calls waiting for human validation, keyed by action ID.
+    Only valid with a single uvicorn worker.
+    """
+    def __init__(self, ttl=PENDING_ACTION_TTL):
+        self.ttl = ttl
+        self._actions = {}   # action id -> (session id, calls, expires_at)
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        for action_id in [a for a, (_, _, expires_at) in self._actions.items() if expires_at <= now]:
+            del self._actions[action_id]
+
+    def put(self, calls, session_id=None):
+        """
+        Stores the calls and returns their action ID.
+
+        Args:
+            calls (list): [{"tool": name, "args": dict}, ...]
+            session_id (str, optional): Client session the action belongs to.
+        """
+        action_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            self._actions[action_id] = (session_id or DEFAULT_SESSION, calls, now + self.ttl)
+        return action_id
+
+    def pop(self, action_id=None, session_id=None):
+        """
+        Removes and returns the calls of an action, or None if missing or expired.
+        Without `action_id`, takes the most recent action of the session.
+        """
+        with self._lock:
+            self._purge(time.time())
+            if action_id is None:
+                session = session_id or DEFAULT_SESSION
+                candidates = [(exp, a) for a, (s, _, exp) in self._actions.items() if s == session]
+                if not candidates:
+                    return None
+                action_id = max(candidates)[1]
+            item = self._actions.pop(action_id, None)
+            return item[1] if item else None
+
+class SQLiteActionStore:
+    """
+    Pending-action store shared by every uvicorn worker through one SQLite file,
+    so /confirm-action may land on a different process than /ask-agent.
+    """
+    def __init__(self, path=PENDING_ACTION_DB, ttl=PENDING_ACTION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending_actions ("
+                "action_id TEXT PRIMARY KEY, session_id TEXT, calls TEXT, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pending_session ON pending_actions(session_id, expires_at)")
+
+    def _conn(self):
+        # One connection per thread; isolation_level=None lets us drive transactions explicitly
+        if getattr(self._local, "conn", None) is None:
+            self._local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return self._local.conn
+
+    def put(self, calls, session_id=None):
+        """Stores the calls and returns their action ID."""
+        action_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM pending_actions WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "INSERT INTO pending_actions VALUES (?, ?, ?, ?)",
+            (action_id, session_id or DEFAULT_SESSION, json.dumps(calls), now + self.ttl)
+        )
+        return action_id
+
+    def pop(self, action_id=None, session_id=None):
+        """Removes and returns the calls of an action, or None if missing or expired."""
+        conn = self._conn()
+        # BEGIN IMMEDIATE: two workers can never confirm the same action
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if action_id is None:
+                row = conn.execute(
+                    "SELECT action_id, calls FROM pending_actions WHERE session_id = ? AND expires_at > ? "
+                    "ORDER BY expires_at DESC LIMIT 1",
+                    (session_id or DEFAULT_SESSION, time.time())
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT action_id, calls FROM pending_actions WHERE action_id = ? AND expires_at > ?",
+                    (action_id, time.time())
+                ).fetchone()
+            if row:
+                conn.execute("DELETE FROM pending_actions WHERE action_id = ?", (row[0],))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return json.loads(row[1]) if row else None
+
+# Store partagé : SQLite si PENDING_ACTION_DB est défini, mémoire sinon
+pending_actions = SQLiteActionStore(PENDING_ACTION_DB) if PENDING_ACTION_DB else MemoryActionStore()
@@ -1,21 +1,25 @@
-from langchain_core.prompts import ChatPromptTemplate
-
 class SmartAgent:
     """
     A generic wrapper for LangChain agents.
     Handles system prompt orchestration and tool binding for specific LLM models.
     """
-    def __init__(self, llm, name, system_prompt, tools=None):
+    def __init__(self, llm, name, system_prompt, tools=None, profile=None):
         """
         Initializes the agent with a specific role and set of capabilities.
         
         Args:
-            llm: The Language Model instance (e.g., ChatOpenAI).
+            llm: The LLMPool serving the agent (one or several OpenAI-compatible servers).
             name (str): Technical name of the agent for logging purposes.
             system_prompt (str): The instructions defining the agent's behavior.
             tools (list, optional): List of @tool functions the agent can execute.
+            profile (ModelProfile, optional): Model, max tokens and stop sequences of this agent.
         """
+        from langchain_core.prompts import ChatPromptTemplate
+
         self.name = name
+        self.llm = llm
+        self.tools = tools
+        self.profile = profile
         
         # Define the message structure
         self.prompt = ChatPromptTemplate.from_messages([
@@ -23,20 +27,54 @@ class SmartAgent:
             ("human", "{input}"),
         ])
         
-        # Bind tools to the model if provided, otherwise use the raw model
-        # This allows the LLM to decide when to call external functions
-        self.model = llm.bind_tools(tools) if tools else llm
-        
-        # Create the execution chain: Prompt -> Model
-        self.chain = self.prompt | self.model
+        # One chain per backend model, built on first use
+        self._chains = {}
+        self._overhead_chars = None
+
+    def chain(self, model):
+        """
+        Returns the execution chain (Prompt -> Model) for one backend model.
+        Tools are bound to the model if provided, otherwise the raw model is used;
+        this allows the LLM to decide when to call external functions.
+        The agent's profile settings are bound on top of the shared server client.
+        """
+        chain = self._chains.get(id(model))
+        if chain is None:
+            bound = model.bind_tools(self.tools) if self.tools else model
+            if self.profile is not None:
+                bound = bound.bind(**self.profile.call_kwargs())
+            chain = self._chains[id(model)] = self.prompt | bound
+        return chain
+
+    def prompt_chars(self, user_input):
+        """
+        Size of the full request sent for `user_input`: system prompt, tool schemas and input.
+
+        Args:
+            user_input (str): The raw text query from the user.
+        Returns:
+            int: Number of characters.
+        """
+        if self._overhead_chars is None:
+            import json
+            system = self.prompt.messages[0].prompt.template
+            schemas = ""
+            if self.tools:
+                from langchain_core.utils.function_calling import convert_to_openai_tool
+                schemas = json.dumps([convert_to_openai_tool(t) for t in self.tools], ensure_ascii=False)
+            self._overhead_chars = len(system) + len(schemas)
+        return self._overhead_chars + len(user_input)
 
-    def invoke(self, user_input):
+    async def ainvoke(self, user_input):
         """
         Sends the user request through the chain.
+        Awaits the model call without blocking the event loop, on the least busy
+        backend of the pool (with failover). There is no synchronous variant: every
+        call goes through the pool so its routing, caps and ejection always apply.
         
         Args:
             user_input (str): The raw text query from the user.
         Returns:
             The model's response (either text or a tool call request).
         """
-        return self.chain.invoke({"input": user_input})
\ No newline at end of file
+        return await self.llm.run(lambda model: self.chain(model).ainvoke({"input": user_input}))
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache with optional per-entry expiry.
+    When `path` is given, entries are persisted as JSON so the cache survives restarts
+    (keys must then be strings and values JSON-serializable).
+    """
+    def __init__(self, maxsize=128, ttl=None, path=None):
+        """
+        Args:
+            maxsize (int): Maximum number of entries before the least recently used is evicted.
+            ttl (float, optional): Default lifetime in seconds. None means entries never expire.
+            path (str, optional): JSON file used to persist the entries.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()   # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                for key, (value, expires_at) in json.load(f).items():
+                    self._data[key] = (value, expires_at)
+        except Exception as e:
+            print(f"Cache file {self.path} ignored ({e})")
+
+    def _save(self):
+        if not self.path:
+            return
+        with open(self.path, 'w') as f:
+            json.dump(dict(self._data), f)
+
+    def get(self, key, default=None):
+        """Returns the cached value, or `default` when missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (item[1] is None or item[1] > time.time()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Stores `value`; `ttl` overrides the cache default lifetime."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._save()
+
+    def stats(self):
+        """Returns hit/miss counters and current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "size": len(self._data),
+                "maxsize": self.maxsize
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+class SQLiteCache:
+    """
+    On-disk counterpart of TTLCache backed by a single SQLite table.
+    Same get/set/stats interface; survives restarts and can be shared by several processes.
+    """
+    def __init__(self, path, maxsize=1024, ttl=None):
+        """
+        Args:
+            path (str): SQLite database file.
+            maxsize (int): Maximum number of rows before the least recently used are evicted.
+            ttl (float, optional): Default lifetime in seconds. None means entries never expire.
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT, expires_at REAL, accessed_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed_at)")
+
+    def get(self, key, default=None):
+        """Returns the cached value, or `default` when missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and (row[1] is None or row[1] > now):
+                with self._conn:
+                    self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(row[0])
+            if row is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Stores `value` (JSON-serializable); `ttl` overrides the cache default lifetime."""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl is not None else None, now)
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,)
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def stats(self):
+        """Returns hit/miss counters and current size."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "size": size,
+                "maxsize": self.maxsize
+            }
+
+    def __len__(self):
+        return self.stats()["size"]
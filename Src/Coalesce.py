@@ -0,0 +1,105 @@
+import asyncio
+
+from .Metrics import registry
+
+# --- SINGLE-FLIGHT COALESCING ---
+# Identical work started while a copy is already running waits for that copy
+# instead of running again (double clicks, several people asking the same thing).
+
+COALESCED = registry.counter(
+    "smarthome_coalesced_total", "Calls that started work (leader) or joined an in-flight one (follower).",
+    ["layer", "role"])
+
+_END = object()
+
+class _Broadcast:
+    """Runs an async generator once and replays its events to every subscriber."""
+    def __init__(self, events):
+        self.history = []
+        self.queues = []
+        self.finished = False
+        self.task = asyncio.ensure_future(self._pump(events))
+
+    async def _pump(self, events):
+        try:
+            async for item in events:
+                self._publish(item)
+        except Exception as e:
+            self._publish(e)
+        finally:
+            self._publish(_END)
+            self.finished = True
+
+    def _publish(self, item):
+        self.history.append(item)
+        for queue in self.queues:
+            queue.put_nowait(item)
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        for item in self.history:
+            queue.put_nowait(item)
+        self.queues.append(queue)
+        return queue
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls sharing a key. The first caller (leader) starts the
+    work in its own task; callers arriving before it completes (followers) get the same
+    result. The work is shielded, so a leader that disconnects does not cancel it.
+    """
+    def __init__(self, layer):
+        self.layer = layer
+        self._flights = {}
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def _count(self, role):
+        self._stats[role + "s"] += 1
+        COALESCED.inc(layer=self.layer, role=role)
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(self, key, factory):
+        """
+        Awaits the shared result of `factory()` for this key.
+
+        Args:
+            key: Hashable identity of the work.
+            factory (callable): Returns the coroutine to run when no copy is in flight.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            self._count("leader")
+            task = asyncio.ensure_future(factory())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self._count("follower")
+        return await asyncio.shield(task)
+
+    async def stream(self, key, factory):
+        """
+        Async-generator variant of run(): every caller receives every event of one
+        shared run, including the ones emitted before it joined.
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight.finished:
+            self._count("leader")
+            flight = _Broadcast(factory())
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self._count("follower")
+        queue = flight.subscribe()
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stats(self):
+        return dict(self._stats, in_flight=len(self._flights))
@@ -1,6 +1,8 @@
 import streamlit as st # pyright: ignore[reportMissingImports]
 import requests
+import json
 import os
+import uuid
 
 # Page configuration
 st.set_page_config(page_title="AI Home OS", page_icon="🤖")
@@ -8,10 +10,28 @@ st.set_page_config(page_title="AI Home OS", page_icon="🤖")
 # URLs de l'API (Backend)
 API_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://127.0.0.1:8000")
 ASK_URL = f"{API_BASE_URL}/ask-agent"
+STREAM_URL = f"{API_BASE_URL}/ask-agent/stream"
 CONFIRM_URL = f"{API_BASE_URL}/confirm-action"
+CANCEL_URL = f"{API_BASE_URL}/cancel-action"
 
 st.title("🤖 AI Home OS")
 
+# Identifiant de session : les actions en attente sont rattachées à ce navigateur
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+def stream_events(prompt):
+    """Yields (event, data) pairs from the backend's server-sent events."""
+    with requests.post(STREAM_URL, json={"instruction": prompt, "session_id": st.session_state.session_id, "timings": True},
+                       stream=True) as response:
+        response.raise_for_status()
+        event_name = "message"
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event_name = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event_name, json.loads(line[len("data:"):].strip())
+
 # --- SIDEBAR : ACTIONS RAPIDES ---
 with st.sidebar:
     st.header("⚡ Actions Agents")
@@ -61,32 +81,53 @@ if prompt:
         st.markdown(prompt)
 
     try:
-        # Appel à l'API FastAPI
-        response = requests.post(ASK_URL, json={"instruction": prompt})
-        data = response.json()
-        
-        api_response = data.get('response', "No response from server.")
-        api_details = data.get('details', [])
-        needs_val = data.get('needs_validation', False)
-        action_details = data.get('action_details', {})
-
-        full_response = f"{api_response}\n\n**System Logs:** {', '.join(api_details) if api_details else 'None'}"
-
         with st.chat_message("assistant"):
-            st.markdown(api_response)
+            status = st.empty()
+            placeholder = st.empty()
+            streamed = ""
+            data = {}
+
+            # Appel à l'API FastAPI en streaming : affichage au fil de l'eau
+            for event_name, payload in stream_events(prompt):
+                if event_name == "routing":
+                    status.caption(f"🧭 Routage : {payload.get('decision')}")
+                elif event_name == "tool":
+                    status.caption(f"🛠️ {payload.get('name')} : {payload.get('status')}")
+                elif event_name == "token":
+                    streamed += payload
+                    placeholder.markdown(streamed + "▌")
+                elif event_name in ("done", "error"):
+                    data = payload
+            status.empty()
+        
+            api_response = data.get('response', "No response from server.")
+            api_details = data.get('details', [])
+            # Détail des temps par étape renvoyé par le backend
+            api_details += [
+                f"{'/'.join(str(v) for k, v in t.items() if k != 'ms' and v)}: {t['ms']} ms"
+                for t in data.get('timings', [])
+            ]
+            needs_val = data.get('needs_validation', False)
+            action_details = data.get('action_details', {})
+
+            full_response = f"{api_response}\n\n**System Logs:** {', '.join(api_details) if api_details else 'None'}"
+
+            placeholder.markdown(api_response)
             
             # --- INTERFACE DE VALIDATION HUMAINE ---
             if needs_val:
+                action_ref = {"action_id": data.get('action_id'), "session_id": st.session_state.session_id}
                 st.info(f"🛡️ **Action en attente :** `{action_details}`")
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     if st.button("✅ Confirmer", key="btn_confirm"):
-                        res_confirm = requests.post(CONFIRM_URL)
+                        res_confirm = requests.post(CONFIRM_URL, json=action_ref)
                         st.success(res_confirm.json().get("response"))
                 
                 with col2:
                     if st.button("❌ Annuler", key="btn_cancel"):
+                        requests.post(CANCEL_URL, json=action_ref)
                         st.error("Action annulée.")
             
             st.caption(f"Logs: {', '.join(api_details)}")
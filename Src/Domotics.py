@@ -1,29 +1,189 @@
-from phue import Bridge  # pyright: ignore[reportMissingImports]
+import os
+import time
+import threading
 
-def Bridge_hue():
+# --- HUE CONFIGURATION ---
+HUE_BRIDGE_IP = os.getenv("HUE_BRIDGE_IP", "192.168.1.122")
+# Période de rafraîchissement du cache d'état des lampes (secondes)
+HUE_STATE_REFRESH = float(os.getenv("HUE_STATE_REFRESH", "30"))
+# Mode simulation explicite : les commandes vont au HueBridgeMock et réussissent toujours
+HUE_SIMULATION = os.getenv("HUE_SIMULATION", "0") == "1"
+# Attente maximale de la connexion au pont avant d'abandonner une commande (secondes)
+HUE_CONNECT_WAIT = float(os.getenv("HUE_CONNECT_WAIT", "3"))
+# Reconnexion avec backoff exponentiel entre ces deux bornes (secondes)
+HUE_RETRY_MIN = 2
+HUE_RETRY_MAX = 300
+
+# Anonymized locations -> hardware light names
+LOCATION_LIGHTS = {
+    "LIVING_ROOM": ["Hue color lamp 1"],
+    "BEDROOM": ["Hue color lamp 2"],
+}
+# Locations addressing every lamp at once (Hue group 0)
+ALL_LOCATIONS = {"ALL", "HOME", "HOUSE", "EVERYWHERE", "TOUT", "MAISON", "PARTOUT"}
+
+class HueBridgeMock:
+    """Stand-in bridge of the simulation mode (HUE_SIMULATION=1), for development without hardware."""
+    def __init__(self):
+        self._lights = {
+            "1": {"name": "Hue color lamp 1", "state": {"on": False}},
+            "2": {"name": "Hue color lamp 2", "state": {"on": False}},
+        }
+
+    def set_light(self, *args, **kwargs):
+        print(f"[MOCK HUE] Light command received: {args} {kwargs}")
+        return True
+
+    def set_group(self, *args, **kwargs):
+        print(f"[MOCK HUE] Group command received: {args} {kwargs}")
+        return True
+
+    def get_api(self):
+        # Same structure as the bridge's full state
+        return {"lights": self._lights, "groups": {}}
+
+class HueController:
     """
-    Attempts to connect to the Philips Hue Bridge.
-    If the connection fails (timeout or network issue), returns a Mock object for debugging.
+    Lazily connected Philips Hue bridge with a cached view of light and group state.
+    The connection runs in a background thread (with reconnect and backoff) so startup
+    never waits on the network. Commands skip lamps already in the requested state and
+    whole-room / whole-home scenes are sent as a single group call. While the bridge is
+    unreachable, commands fail instead of pretending to succeed (except in simulation mode).
     """
-    bridge_ip = "192.168.1.122"
-    try:
-        b = Bridge(bridge_ip)
-        b.connect()
-        print("✅ Successfully connected to Hue Bridge")
-        return b
-    except Exception as e:
-        print(f"⚠️ Simulation Mode: Could not connect to Bridge ({e})")
-        
-        # This Mock class prevents the rest of your app from crashing
-        class HueBridgeMock:
-            def set_light(self, *args, **kwargs):
-                print(f"[MOCK HUE] Light command received: {args} {kwargs}")
-                return True
-            def get_api(self):
-                # Returns a basic structure if your code checks light status
-                return {"lights": {"1": {"state": {"on": True}}}}
-        
-        return HueBridgeMock()
-
-# The variable name 'pont' or 'bridge' used in your other files
-bridge = Bridge_hue()
\ No newline at end of file
+    def __init__(self, bridge_ip=HUE_BRIDGE_IP, refresh_interval=HUE_STATE_REFRESH, simulation=HUE_SIMULATION):
+        self.bridge_ip = bridge_ip
+        self.refresh_interval = refresh_interval
+        self.simulation = simulation
+        self.bridge = None
+        self.connected = False
+        self._ready = threading.Event()   # set while connected with a fresh state cache
+        self._mock = HueBridgeMock()
+        self._lights = {}   # light id -> {"name", "state"}
+        self._groups = {}   # group id -> {"name", "lights"}
+        self._lock = threading.RLock()
+        self._thread = None
+
+    # --- Background connection ---
+
+    def start(self):
+        """Starts the background connection thread (idempotent)."""
+        with self._lock:
+            if self.simulation:
+                if not self._ready.is_set():
+                    print("⚠️ Simulation Mode: Hue commands go to the mock bridge")
+                    self._refresh_state()
+                    self._ready.set()
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="hue-bridge", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        from phue import Bridge  # pyright: ignore[reportMissingImports]
+        delay = HUE_RETRY_MIN
+        while True:
+            try:
+                if not self.connected:
+                    # Once paired, connect() makes no network call: only a state read proves the bridge answers
+                    b = Bridge(self.bridge_ip)
+                    b.connect()
+                    with self._lock:
+                        self.bridge = b
+                self._refresh_state()
+            except Exception as e:
+                if self.connected:
+                    print(f"⚠️ Hue Bridge lost ({e}), reconnecting")
+                elif delay == HUE_RETRY_MIN:
+                    print(f"⚠️ Could not connect to Hue Bridge ({e}), retrying in the background")
+                self._ready.clear()
+                with self._lock:
+                    self.connected = False
+                time.sleep(delay)
+                delay = min(delay * 2, HUE_RETRY_MAX)
+                continue
+            if not self.connected:
+                with self._lock:
+                    self.connected = True
+                print("✅ Successfully connected to Hue Bridge")
+            self._ready.set()
+            delay = HUE_RETRY_MIN
+            time.sleep(self.refresh_interval)
+
+    @property
+    def active(self):
+        """The mock in simulation mode, the real bridge otherwise (None before the first attempt)."""
+        return self._mock if self.simulation else self.bridge
+
+    def _refresh_state(self):
+        api = self.active.get_api()
+        with self._lock:
+            self._lights = {
+                lid: {"name": light.get("name"), "on": light.get("state", {}).get("on")}
+                for lid, light in api.get("lights", {}).items()
+            }
+            self._groups = {
+                gid: {"name": group.get("name", ""), "lights": list(group.get("lights", []))}
+                for gid, group in api.get("groups", {}).items()
+            }
+
+    # --- Commands ---
+
+    def _resolve(self, location):
+        """Returns (group_id or None, [light ids or names]) for a location, or None if unknown."""
+        loc = location.strip().upper()
+        if loc in ALL_LOCATIONS:
+            return 0, list(self._lights)
+        if loc in LOCATION_LIGHTS:
+            by_name = {light["name"]: lid for lid, light in self._lights.items()}
+            return None, [by_name.get(name, name) for name in LOCATION_LIGHTS[loc]]
+        for gid, group in self._groups.items():
+            if group["name"].upper() == loc:
+                return gid, group["lights"]
+        return None
+
+    def switch(self, location, on):
+        """
+        Turns the lights of a location on or off.
+
+        Args:
+            location (str): 'LIVING_ROOM', 'BEDROOM', 'ALL' or a Hue room name.
+            on (bool): Target state.
+        Returns:
+            str: Human-readable outcome.
+        """
+        self.start()
+        action = "ON" if on else "OFF"
+        # Never report success for a command the bridge did not receive
+        if not self._ready.wait(HUE_CONNECT_WAIT):
+            return f"Hue Bridge unreachable: {location} light not changed."
+        with self._lock:
+            target = self._resolve(location)
+            if target is None:
+                return f"Unknown location: {location}."
+            group_id, lights = target
+            # Lamps whose cached state already matches are skipped
+            pending = [l for l in lights if self._lights.get(l, {}).get("on") != on]
+            if lights and not pending:
+                return f"{location} light already {action}."
+            bridge = self.active
+            if bridge is None:
+                return f"Hue Bridge unreachable: {location} light not changed."
+
+        if group_id is not None:
+            bridge.set_group(int(group_id), 'on', on)
+        else:
+            bridge.set_light([int(l) if str(l).isdigit() else l for l in pending], 'on', on)
+
+        with self._lock:
+            for l in lights:
+                if l in self._lights:
+                    self._lights[l]["on"] = on
+        return f"{location} light set to {action}."
+
+    def status(self):
+        """Returns the cached light states, keyed by light name."""
+        with self._lock:
+            return {light["name"]: light["on"] for light in self._lights.values()}
+
+# Shared controller; the bridge connects on first use or at API startup
+hue = HueController()
@@ -0,0 +1,133 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .Network import get_session
+
+# --- FEED FETCHING CONFIGURATION ---
+FEED_TTL = int(os.getenv("NEWS_FEED_TTL", "600"))          # fraîcheur d'un flux en cache (s)
+FEED_TIMEOUT = float(os.getenv("NEWS_FEED_TIMEOUT", "5"))  # délai maximum par flux (s)
+FEED_MAX_WORKERS = int(os.getenv("NEWS_FEED_WORKERS", "8"))
+
+# Mimics a browser to bypass institutional bot filters
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+class FeedFetcher:
+    """
+    Concurrent RSS fetcher with a per-feed TTL cache.
+    Stale feeds are revalidated with ETag/Last-Modified, so an unchanged feed costs a 304
+    instead of a full download and XML parse.
+    """
+    def __init__(self, ttl=FEED_TTL, timeout=FEED_TIMEOUT, max_workers=FEED_MAX_WORKERS):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._state = {}   # url -> {"entries", "etag", "modified", "fetched_at"}
+        self._stats = {}   # feed key -> counters
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed")
+
+    def _record(self, key, outcome, latency=None):
+        with self._lock:
+            stats = self._stats.setdefault(key, {
+                "hits": 0, "misses": 0, "not_modified": 0, "errors": 0, "timeouts": 0,
+                "fetches": 0, "last_latency_ms": None, "avg_latency_ms": None
+            })
+            stats[outcome] += 1
+            if latency is not None:
+                stats["fetches"] += 1
+                ms = round(latency * 1000, 1)
+                stats["last_latency_ms"] = ms
+                previous = stats["avg_latency_ms"] or 0.0
+                stats["avg_latency_ms"] = round(previous + (ms - previous) / stats["fetches"], 1)
+
+    def fetch(self, key, url):
+        """
+        Returns the parsed entries of one feed, from cache when fresh.
+        
+        Args:
+            key (str): Feed identifier used for statistics.
+            url (str): RSS/Atom URL.
+        Returns:
+            list: Entries as dicts with 'title', 'link' and 'published' keys.
+        """
+        with self._lock:
+            state = self._state.get(url)
+        if state and time.monotonic() - state["fetched_at"] < self.ttl:
+            self._record(key, "hits")
+            return state["entries"]
+
+        headers = {"User-Agent": USER_AGENT}
+        if state:
+            if state["etag"]:
+                headers["If-None-Match"] = state["etag"]
+            if state["modified"]:
+                headers["If-Modified-Since"] = state["modified"]
+
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and state:
+                self._record(key, "not_modified", time.perf_counter() - start)
+                with self._lock:
+                    state["fetched_at"] = time.monotonic()
+                return state["entries"]
+            response.raise_for_status()
+
+            import feedparser # pyright: ignore[reportMissingImports]
+            feed = feedparser.parse(response.content)
+            entries = [
+                {
+                    "title": entry.get("title", "").replace('\n', ' ').strip(),
+                    "link": entry.get("link", ""),
+                    "published": entry.get("published", "")
+                }
+                for entry in feed.entries if entry.get("title")
+            ]
+            self._record(key, "misses", time.perf_counter() - start)
+            with self._lock:
+                self._state[url] = {
+                    "entries": entries,
+                    "etag": response.headers.get("ETag"),
+                    "modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.monotonic()
+                }
+            return entries
+        except Exception as e:
+            self._record(key, "errors", time.perf_counter() - start)
+            print(f"Error scanning {key}: {e}")
+            # Serve the last known entries rather than nothing
+            return state["entries"] if state else []
+
+    def fetch_many(self, feeds):
+        """
+        Fetches several feeds in parallel.
+        The call is bounded by the slowest feed (at most `timeout`); late feeds fall back
+        to their cached entries.
+        
+        Args:
+            feeds (dict): Mapping of feed key -> URL.
+        Returns:
+            dict: Mapping of feed key -> list of entries, in the input order.
+        """
+        futures = {key: self._pool.submit(self.fetch, key, url) for key, url in feeds.items()}
+        wait(futures.values(), timeout=self.timeout + 1)
+
+        results = {}
+        for key, future in futures.items():
+            if future.done() and not future.exception():
+                results[key] = future.result()
+            else:
+                self._record(key, "timeouts")
+                with self._lock:
+                    state = self._state.get(feeds[key])
+                results[key] = state["entries"] if state else []
+        return results
+
+    def stats(self):
+        """Returns a copy of the per-feed hit/miss/latency counters."""
+        with self._lock:
+            return {key: dict(values) for key, values in self._stats.items()}
+
+# Instance partagée par les outils
+feed_fetcher = FeedFetcher()
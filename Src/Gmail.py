@@ -0,0 +1,167 @@
+import os
+import json
+import threading
+
+# --- GMAIL CONFIGURATION ---
+GMAIL_MAX_RESULTS = int(os.getenv("GMAIL_MAX_RESULTS", "5"))
+GMAIL_CACHE_FILE = os.getenv("GMAIL_CACHE_FILE", "gmail_cache.json")
+GMAIL_CACHE_SIZE = int(os.getenv("GMAIL_CACHE_SIZE", "200"))
+# Gmail recommends at most 50 sub-requests per batch call
+GMAIL_BATCH_SIZE = 50
+
+# Only the fields we actually read: no body, no attachments
+METADATA_FIELDS = "id,snippet,internalDate,labelIds,payload/headers"
+METADATA_HEADERS = ["Subject", "From"]
+
+class GmailMailbox:
+    """
+    Local mirror of the most recent INBOX messages (metadata only).
+    The first call lists the inbox; later calls replay the Gmail history since the last
+    sync, so only mail that arrived in between is downloaded. The cache file is read on
+    first use, not at import.
+    """
+    def __init__(self, cache_file=GMAIL_CACHE_FILE, cache_size=GMAIL_CACHE_SIZE):
+        self.cache_file = cache_file
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._history_id = None
+        self._messages = {}   # message id -> {"id", "subject", "sender", "snippet", "internal_date"}
+        self._loaded = False
+
+    # --- Persistence ---
+
+    def _load(self):
+        self._loaded = True
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file) as f:
+                data = json.load(f)
+            self._history_id = data.get("history_id")
+            self._messages = data.get("messages", {})
+        except Exception as e:
+            print(f"Gmail cache ignored ({e})")
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        with open(self.cache_file, 'w') as f:
+            json.dump({"history_id": self._history_id, "messages": self._messages}, f)
+
+    # --- Gmail API calls ---
+
+    def _fetch_metadata(self, service, message_ids):
+        """Downloads the metadata of several messages in batched round trips."""
+        fetched = {}
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                # Message deleted between the listing and the batch: skip it
+                return
+            headers = response.get('payload', {}).get('headers', [])
+            header = lambda name, default: next((h['value'] for h in headers if h['name'].lower() == name), default)
+            fetched[response['id']] = {
+                "id": response['id'],
+                "subject": header('subject', "No Subject"),
+                "sender": header('from', ""),
+                "snippet": response.get('snippet', ""),
+                "internal_date": int(response.get('internalDate', 0))
+            }
+
+        for i in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=on_response)
+            for message_id in message_ids[i:i + GMAIL_BATCH_SIZE]:
+                batch.add(service.users().messages().get(
+                    userId='me', id=message_id, format='metadata',
+                    metadataHeaders=METADATA_HEADERS, fields=METADATA_FIELDS
+                ))
+            batch.execute()
+        return fetched
+
+    def _full_sync(self, service, count):
+        # The profile history ID is read first so nothing arriving during the listing is missed
+        history_id = service.users().getProfile(userId='me', fields='historyId').execute()['historyId']
+        results = service.users().messages().list(
+            userId='me', labelIds=['INBOX'], maxResults=count, fields='messages/id'
+        ).execute()
+        inbox_ids = [m['id'] for m in results.get('messages', [])]
+
+        missing = [mid for mid in inbox_ids if mid not in self._messages]
+        cached = {mid: self._messages[mid] for mid in inbox_ids if mid in self._messages}
+        cached.update(self._fetch_metadata(service, missing))
+        self._messages = cached
+        self._history_id = history_id
+
+    def _incremental_sync(self, service):
+        # Message id -> still in the inbox; history records are chronological, the last one wins
+        in_inbox = {}
+        page_token = None
+        while True:
+            response = service.users().history().list(
+                userId='me', startHistoryId=self._history_id, labelId='INBOX',
+                historyTypes=['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved'],
+                pageToken=page_token
+            ).execute()
+            for record in response.get('history', []):
+                for item in record.get('messagesAdded', []):
+                    if 'INBOX' in item['message'].get('labelIds', []):
+                        in_inbox[item['message']['id']] = True
+                # Message moved back into the inbox
+                for item in record.get('labelsAdded', []):
+                    if 'INBOX' in item.get('labelIds', []):
+                        in_inbox[item['message']['id']] = True
+                for item in record.get('messagesDeleted', []):
+                    in_inbox[item['message']['id']] = False
+                for item in record.get('labelsRemoved', []):
+                    if 'INBOX' in item.get('labelIds', []):
+                        in_inbox[item['message']['id']] = False
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        new_ids = [mid for mid, present in in_inbox.items() if present and mid not in self._messages]
+        self._messages.update(self._fetch_metadata(service, new_ids))
+        for mid, present in in_inbox.items():
+            if not present:
+                self._messages.pop(mid, None)
+        self._history_id = response.get('historyId', self._history_id)
+
+    # --- Public API ---
+
+    def recent(self, service, count=GMAIL_MAX_RESULTS):
+        """
+        Returns the `count` most recent INBOX messages, newest first.
+
+        Args:
+            service: Gmail v1 discovery client.
+            count (int): Number of messages wanted.
+        Returns:
+            list: Message metadata dicts.
+        """
+        from googleapiclient.errors import HttpError # pyright: ignore[reportMissingImports]
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._history_id and len(self._messages) >= count:
+                try:
+                    self._incremental_sync(service)
+                except HttpError as e:
+                    # 404: the stored history ID is too old, start over
+                    if e.resp.status != 404:
+                        raise
+                    self._full_sync(service, count)
+                else:
+                    # Removed messages leave a gap only a listing can fill
+                    if len(self._messages) < count:
+                        self._full_sync(service, count)
+            else:
+                self._full_sync(service, count)
+
+            ordered = sorted(self._messages.values(), key=lambda m: m["internal_date"], reverse=True)
+            self._messages = {m["id"]: m for m in ordered[:max(self.cache_size, count)]}
+            self._save()
+            return ordered[:count]
+
+# Instance partagée par les outils
+gmail_mailbox = GmailMailbox()
@@ -0,0 +1,151 @@
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# --- GOOGLE AUTH CONFIGURATION ---
+SCOPES = [
+    'https://www.googleapis.com/auth/calendar.readonly',
+    'https://www.googleapis.com/auth/gmail.readonly'
+]
+
+# Token and credentials files should be in .gitignore
+TOKEN_FILE = os.getenv("GOOGLE_TOKEN_FILE", "token.json")
+CREDENTIALS_FILE = os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json")
+# Le jeton est rafraîchi en arrière-plan quand il expire dans moins de REFRESH_MARGIN secondes
+REFRESH_MARGIN = int(os.getenv("GOOGLE_REFRESH_MARGIN", "300"))
+REFRESH_INTERVAL = int(os.getenv("GOOGLE_REFRESH_INTERVAL", "60"))
+# Délai réseau des appels Calendar/Gmail (httplib2 n'en a aucun par défaut)
+GOOGLE_HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", "10"))
+
+class CredentialManager:
+    """
+    Process-wide owner of the Google OAuth2 credentials and discovery-built clients.
+    Keeps one warm client per (service, version) and refreshes the token ahead of expiry
+    in a background thread, so tools never pay for discovery or a token refresh.
+    """
+    def __init__(self, token_file=TOKEN_FILE, credentials_file=CREDENTIALS_FILE,
+                 refresh_margin=REFRESH_MARGIN, refresh_interval=REFRESH_INTERVAL):
+        self.token_file = token_file
+        self.credentials_file = credentials_file
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.refresh_interval = refresh_interval
+        self._creds = None
+        self._saved_token = None   # last content written to / read from token_file
+        self._clients = {}         # (service, version) -> discovery client
+        self._client_locks = {}    # discovery clients (httplib2) are not thread-safe
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    # --- Token lifecycle (called with self._lock held) ---
+
+    def _load(self):
+        # Google API Libraries, imported on first use to keep API startup fast
+        from google.auth.transport.requests import Request # pyright: ignore[reportMissingImports]
+        from google.oauth2.credentials import Credentials # pyright: ignore[reportMissingImports]
+        from google_auth_oauthlib.flow import InstalledAppFlow # pyright: ignore[reportMissingImports]
+
+        creds = None
+        if os.path.exists(self.token_file):
+            creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
+            with open(self.token_file) as token:
+                self._saved_token = token.read()
+
+        if not creds or (not creds.valid and not (creds.expired and creds.refresh_token)):
+            flow = InstalledAppFlow.from_client_secrets_file(self.credentials_file, SCOPES)
+            creds = flow.run_local_server(port=0)
+
+        self._creds = creds
+        if not creds.valid:
+            creds.refresh(Request())
+        self._persist()
+
+    def _persist(self):
+        """Writes the token file only when the token actually changed."""
+        data = self._creds.to_json()
+        if data != self._saved_token:
+            with open(self.token_file, 'w') as token:
+                token.write(data)
+            self._saved_token = data
+
+    def _expires_soon(self):
+        # google-auth stores expiry as a naive UTC datetime
+        expiry = self._creds.expiry
+        return expiry is not None and expiry - datetime.utcnow() < self.refresh_margin
+
+    def _refresh_loop(self):
+        from google.auth.transport.requests import Request # pyright: ignore[reportMissingImports]
+        while not self._stop.wait(self.refresh_interval):
+            with self._lock:
+                if not self._creds or not self._creds.refresh_token or not self._expires_soon():
+                    continue
+                try:
+                    self._creds.refresh(Request())
+                    self._persist()
+                except Exception as e:
+                    print(f"Google token refresh failed: {e}")
+
+    # --- Public API ---
+
+    def credentials(self):
+        """Returns valid credentials, loading them on first use."""
+        with self._lock:
+            if self._creds is None:
+                self._load()
+                self._refresher = threading.Thread(target=self._refresh_loop, name="google-token-refresh", daemon=True)
+                self._refresher.start()
+            elif not self._creds.valid:
+                # Fallback when the background refresh could not run in time
+                from google.auth.transport.requests import Request # pyright: ignore[reportMissingImports]
+                self._creds.refresh(Request())
+                self._persist()
+            return self._creds
+
+    @contextmanager
+    def client(self, service_name, version):
+        """
+        Yields the warm discovery client for (service_name, version).
+
+        Args:
+            service_name (str): Google API name, e.g. 'gmail' or 'calendar'.
+            version (str): API version, e.g. 'v1'.
+        """
+        creds = self.credentials()
+        key = (service_name, version)
+        with self._lock:
+            if key not in self._clients:
+                import httplib2 # pyright: ignore[reportMissingImports]
+                from google_auth_httplib2 import AuthorizedHttp # pyright: ignore[reportMissingImports]
+                from googleapiclient.discovery import build # pyright: ignore[reportMissingImports]
+                # The client shares the credentials object, so in-place refreshes apply to it.
+                # A bounded socket timeout keeps a stalled call from pinning a tool thread forever.
+                http = AuthorizedHttp(creds, http=httplib2.Http(timeout=GOOGLE_HTTP_TIMEOUT))
+                self._clients[key] = build(service_name, version, http=http, cache_discovery=False)
+                self._client_locks[key] = threading.Lock()
+            service, lock = self._clients[key], self._client_locks[key]
+        with lock:
+            yield service
+
+    @property
+    def authorized(self):
+        """True once a token file exists, i.e. using the APIs will not start the OAuth flow."""
+        return os.path.exists(self.token_file)
+
+    def warm_up(self, *services):
+        """Builds the given (service_name, version) clients ahead of the first request."""
+        if not self.authorized:
+            # Never start the interactive OAuth flow from a background warm-up
+            return
+        try:
+            for service_name, version in services:
+                with self.client(service_name, version):
+                    pass
+        except Exception as e:
+            print(f"Google warm-up failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+# Instance partagée par les outils
+google_services = CredentialManager()
@@ -0,0 +1,295 @@
+import os
+import time
+import sqlite3
+import threading
+
+from .Router import normalize
+from .Prompts import similarity
+
+# --- HEADLINE STORE CONFIGURATION ---
+# Fichier SQLite des titres (vide = en mémoire, perdu au redémarrage)
+HEADLINE_DB = os.getenv("HEADLINE_DB", "headlines.sqlite")
+# Rétention : durée maximale et nombre maximal de titres conservés
+HEADLINE_RETENTION_DAYS = float(os.getenv("HEADLINE_RETENTION_DAYS", "30"))
+HEADLINE_MAX_ROWS = int(os.getenv("HEADLINE_MAX_ROWS", "50000"))
+# Deux titres publiés à moins de CLUSTER_WINDOW_HOURS d'écart et partageant
+# CLUSTER_SIMILARITY de leurs mots significatifs racontent la même histoire
+CLUSTER_WINDOW_HOURS = float(os.getenv("HEADLINE_CLUSTER_WINDOW_HOURS", "48"))
+CLUSTER_SIMILARITY = float(os.getenv("HEADLINE_CLUSTER_SIMILARITY", "0.5"))
+# Nettoyage de rétention au plus une fois par intervalle (secondes)
+PRUNE_INTERVAL = 3600
+
+# Words that say nothing about the story itself
+STOPWORDS = {
+    "les", "des", "une", "pour", "par", "sur", "dans", "avec", "aux", "est", "sont", "qui", "que",
+    "pas", "plus", "son", "ses", "leur", "leurs", "cette", "ces", "mais", "ont", "selon", "apres",
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "has", "have", "after", "over",
+}
+
+def signature(title):
+    """Significant words of a title: normalized, without accents, stopwords or short words."""
+    return {w for w in normalize(title) if len(w) > 2 and w not in STOPWORDS}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    sources INTEGER NOT NULL DEFAULT 1,
+    reported_at REAL
+);
+CREATE INDEX IF NOT EXISTS clusters_last_seen ON clusters(last_seen);
+CREATE INDEX IF NOT EXISTS clusters_unreported ON clusters(reported_at, last_seen);
+
+CREATE TABLE IF NOT EXISTS headlines (
+    id INTEGER PRIMARY KEY,
+    feed TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL UNIQUE,
+    published TEXT,
+    fetched_at REAL NOT NULL,
+    signature TEXT NOT NULL,
+    cluster_id INTEGER NOT NULL REFERENCES clusters(id)
+);
+CREATE INDEX IF NOT EXISTS headlines_cluster ON headlines(cluster_id, feed);
+CREATE INDEX IF NOT EXISTS headlines_fetched ON headlines(fetched_at);
+"""
+
+# Full-text index over the titles, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS headlines_fts USING fts5(
+    title, content='headlines', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS headlines_ai AFTER INSERT ON headlines BEGIN
+    INSERT INTO headlines_fts(rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS headlines_ad AFTER DELETE ON headlines BEGIN
+    INSERT INTO headlines_fts(headlines_fts, rowid, title) VALUES ('delete', old.id, old.title);
+END;
+"""
+
+class HeadlineStore:
+    """
+    Append-only SQLite archive of the RSS headlines, with near-duplicate stories from
+    different outlets grouped into clusters. Stories are ranked by how many outlets
+    cover them, and each one is flagged once an answer citing it has reached the user,
+    so a briefing only brings what the user has not heard yet. The database is opened
+    on first use, not at import.
+    """
+    def __init__(self, path=HEADLINE_DB, retention_days=HEADLINE_RETENTION_DAYS, max_rows=HEADLINE_MAX_ROWS):
+        """
+        Args:
+            path (str): SQLite database file ('' keeps the store in memory).
+            retention_days (float): Headlines older than this are deleted.
+            max_rows (int): Above this many headlines, the oldest are deleted.
+        """
+        self.path = path
+        self.retention = retention_days * 86400
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._last_prune = 0.0
+        self._conn = None
+        self.fts = None
+
+    def _open(self):
+        """Returns the connection, creating the database and its schema on first use."""
+        with self._open_lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path or ":memory:", check_same_thread=False, timeout=10)
+                with conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                    try:
+                        conn.executescript(FTS_SCHEMA)
+                        self.fts = True
+                    except sqlite3.OperationalError:
+                        # SQLite built without FTS5: candidates come from the time window only
+                        self.fts = False
+                self._conn = conn
+        return self._conn
+
+    # --- Ingestion ---
+
+    def _candidates(self, title, since):
+        """Recent headlines that may tell the same story: (cluster_id, signature) rows."""
+        if self.fts:
+            words = signature(title)
+            if not words:
+                return []
+            query = " OR ".join(f'"{w}"' for w in words)
+            return self._conn.execute(
+                "SELECT h.cluster_id, h.signature FROM headlines_fts f JOIN headlines h ON h.id = f.rowid "
+                "WHERE headlines_fts MATCH ? AND h.fetched_at >= ? ORDER BY f.rank LIMIT 20",
+                (query, since)
+            ).fetchall()
+        return self._conn.execute(
+            "SELECT cluster_id, signature FROM headlines WHERE fetched_at >= ? ORDER BY id DESC LIMIT 500",
+            (since,)
+        ).fetchall()
+
+    def add(self, feed, entries):
+        """
+        Stores the entries of one feed not seen before and attaches each to a cluster.
+
+        Args:
+            feed (str): Feed key (see Src.Tools.NEWS_FEEDS).
+            entries (list): Feed entries with 'title', 'link' and 'published'.
+        Returns:
+            int: Number of new headlines.
+        """
+        entries = [e for e in entries if e.get("title") and (e.get("link") or e.get("title"))]
+        if not entries:
+            return 0
+        now = time.time()
+        links = [e.get("link") or e["title"] for e in entries]
+        self._open()
+        with self._lock, self._conn:
+            placeholders = ",".join("?" * len(links))
+            known = {row[0] for row in self._conn.execute(
+                f"SELECT link FROM headlines WHERE link IN ({placeholders})", links)}
+            added = 0
+            for entry, link in zip(entries, links):
+                if link in known:
+                    continue
+                known.add(link)
+                words = signature(entry["title"])
+                cluster_id = None
+                best = CLUSTER_SIMILARITY
+                for candidate_id, candidate_sig in self._candidates(entry["title"], now - CLUSTER_WINDOW_HOURS * 3600):
+                    score = similarity(words, set(candidate_sig.split()))
+                    if score >= best:
+                        cluster_id, best = candidate_id, score
+                if cluster_id is None:
+                    cluster_id = self._conn.execute(
+                        "INSERT INTO clusters (title, first_seen, last_seen) VALUES (?, ?, ?)",
+                        (entry["title"], now, now)
+                    ).lastrowid
+                else:
+                    new_source = self._conn.execute(
+                        "SELECT 1 FROM headlines WHERE cluster_id = ? AND feed = ? LIMIT 1", (cluster_id, feed)
+                    ).fetchone() is None
+                    self._conn.execute(
+                        "UPDATE clusters SET last_seen = ?, sources = sources + ? WHERE id = ?",
+                        (now, int(new_source), cluster_id)
+                    )
+                self._conn.execute(
+                    "INSERT INTO headlines (feed, title, link, published, fetched_at, signature, cluster_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (feed, entry["title"], link, entry.get("published"), now, " ".join(sorted(words)), cluster_id)
+                )
+                added += 1
+        if now - self._last_prune > PRUNE_INTERVAL:
+            self.prune()
+        return added
+
+    def prune(self):
+        """Applies the retention policy (age, then row count) and drops empty clusters."""
+        self._open()
+        with self._lock, self._conn:
+            self._last_prune = time.time()
+            self._conn.execute("DELETE FROM headlines WHERE fetched_at < ?", (self._last_prune - self.retention,))
+            self._conn.execute(
+                "DELETE FROM headlines WHERE id IN (SELECT id FROM headlines ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            )
+            self._conn.execute(
+                "DELETE FROM clusters WHERE last_seen < ? AND NOT EXISTS "
+                "(SELECT 1 FROM headlines h WHERE h.cluster_id = clusters.id)",
+                (self._last_prune - CLUSTER_WINDOW_HOURS * 3600,)
+            )
+
+    # --- Queries ---
+
+    def stories(self, feeds=None, since_hours=24, limit=12, unreported_only=False, mark_reported=False):
+        """
+        Returns the top stories, never-reported ones first, then by number of outlets and recency.
+        Reading them changes nothing by default, so the same data gives the same list (LLM
+        cache, prefetch); stories are flagged with mark_reported() once an answer is delivered.
+
+        Args:
+            feeds (list, optional): Only stories covered by one of these feed keys.
+            since_hours (float): Only stories updated within this window.
+            limit (int): Maximum number of stories.
+            unreported_only (bool): Skip the stories already reported.
+            mark_reported (bool): Flag the returned stories as reported right away.
+        Returns:
+            list: Dicts with 'title', 'feeds' (outlet keys), 'sources' and 'new'.
+        """
+        since = time.time() - since_hours * 3600
+        where = ["c.last_seen >= ?"]
+        params = [since]
+        if unreported_only:
+            where.append("c.reported_at IS NULL")
+        if feeds:
+            where.append(f"EXISTS (SELECT 1 FROM headlines f WHERE f.cluster_id = c.id "
+                         f"AND f.feed IN ({','.join('?' * len(feeds))}))")
+            params.extend(feeds)
+        self._open()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.id, c.title, c.sources, c.reported_at IS NULL, "
+                "(SELECT GROUP_CONCAT(DISTINCT h.feed) FROM headlines h WHERE h.cluster_id = c.id) "
+                f"FROM clusters c WHERE {' AND '.join(where)} "
+                "ORDER BY c.reported_at IS NOT NULL, c.sources DESC, c.last_seen DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+            if mark_reported and rows:
+                with self._conn:
+                    self._conn.execute(
+                        f"UPDATE clusters SET reported_at = ? WHERE id IN ({','.join('?' * len(rows))}) "
+                        "AND reported_at IS NULL",
+                        [time.time()] + [row[0] for row in rows]
+                    )
+        return [
+            {"title": title, "feeds": (feed_list or "").split(","), "sources": sources, "new": bool(new)}
+            for _, title, sources, new, feed_list in rows
+        ]
+
+    def mark_reported(self, titles):
+        """
+        Flags the stories with these titles as reported.
+
+        Args:
+            titles (list): Story titles, as returned by stories().
+        Returns:
+            int: Number of stories newly flagged.
+        """
+        titles = list(dict.fromkeys(titles))
+        if not titles:
+            return 0
+        self._open()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"UPDATE clusters SET reported_at = ? WHERE title IN ({','.join('?' * len(titles))}) "
+                "AND reported_at IS NULL",
+                [time.time()] + titles
+            ).rowcount
+
+    def search(self, text, limit=10):
+        """Full-text search over the archived headlines, most recent first."""
+        self._open()
+        if not self.fts:
+            return []
+        query = " ".join(f'"{w}"' for w in normalize(text))
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT h.feed, h.title, h.published FROM headlines_fts f JOIN headlines h ON h.id = f.rowid "
+                "WHERE headlines_fts MATCH ? ORDER BY h.id DESC LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        return [{"feed": feed, "title": title, "published": published} for feed, title, published in rows]
+
+    def stats(self):
+        self._open()
+        with self._lock:
+            headlines = self._conn.execute("SELECT COUNT(*) FROM headlines").fetchone()[0]
+            clusters = self._conn.execute("SELECT COUNT(*) FROM clusters").fetchone()[0]
+            unreported = self._conn.execute("SELECT COUNT(*) FROM clusters WHERE reported_at IS NULL").fetchone()[0]
+        return {"headlines": headlines, "stories": clusters, "unreported": unreported, "fts": self.fts}
+
+# Instance partagée par les outils (la base est ouverte au premier usage)
+headline_store = HeadlineStore()
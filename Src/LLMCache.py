@@ -0,0 +1,84 @@
+import os
+import hashlib
+import threading
+
+from .Cache import TTLCache, SQLiteCache
+
+# --- LLM RESULT CACHE CONFIGURATION ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+# Fichier SQLite optionnel : le cache survit alors aux redémarrages
+LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE")
+
+# Durée de vie d'une synthèse par catégorie (secondes)
+LLM_CACHE_TTLS = {
+    "weather": int(os.getenv("LLM_CACHE_TTL_WEATHER", "900")),
+    "personal": int(os.getenv("LLM_CACHE_TTL_PERSONAL", "300")),
+    "news": int(os.getenv("LLM_CACHE_TTL_NEWS", "1800")),
+    "general": int(os.getenv("LLM_CACHE_TTL_GENERAL", "3600")),
+}
+
+def normalize_prompt(prompt):
+    """Collapses whitespace so cosmetic differences do not defeat the cache."""
+    return " ".join(prompt.split())
+
+class LLMCache:
+    """
+    Content-addressed cache of LLM completions.
+    Entries are keyed on (model, temperature, sha256 of the normalized prompt). Only
+    deterministic calls (temperature 0) are cached, since otherwise replaying an answer
+    would change the behavior.
+    """
+    def __init__(self, store, ttls=LLM_CACHE_TTLS, enabled=LLM_CACHE_ENABLED):
+        """
+        Args:
+            store: TTLCache or SQLiteCache holding the completions.
+            ttls (dict): Lifetime in seconds per category.
+            enabled (bool): When False every lookup misses and nothing is stored.
+        """
+        self.store = store
+        self.ttls = ttls
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._categories = {}   # category -> {"hits", "misses"}
+
+    @staticmethod
+    def key(model, temperature, prompt):
+        digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return f"{model}|{temperature}|{digest}"
+
+    def _cacheable(self, temperature):
+        return self.enabled and (temperature or 0) == 0
+
+    def _count(self, category, outcome):
+        with self._lock:
+            counters = self._categories.setdefault(category, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def get(self, model, temperature, prompt, category="general"):
+        """Returns the cached completion text, or None."""
+        if not self._cacheable(temperature):
+            return None
+        response = self.store.get(self.key(model, temperature, prompt))
+        self._count(category, "hits" if response is not None else "misses")
+        return response
+
+    def set(self, model, temperature, prompt, response, category="general"):
+        """Stores a completion with the TTL of its category."""
+        if not self._cacheable(temperature) or not response:
+            return
+        self.store.set(self.key(model, temperature, prompt), response, ttl=self.ttls.get(category))
+
+    def stats(self):
+        """Returns overall and per-category hit rates."""
+        with self._lock:
+            categories = {
+                name: dict(c, hit_rate=round(c["hits"] / (c["hits"] + c["misses"]), 3))
+                for name, c in self._categories.items()
+            }
+        return {"enabled": self.enabled, "store": self.store.stats(), "categories": categories}
+
+# Instance partagée par le pipeline
+llm_cache = LLMCache(
+    SQLiteCache(LLM_CACHE_FILE, maxsize=LLM_CACHE_SIZE) if LLM_CACHE_FILE else TTLCache(maxsize=LLM_CACHE_SIZE)
+)
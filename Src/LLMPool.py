@@ -0,0 +1,199 @@
+import os
+import time
+import asyncio
+
+from .Network import get_session
+from .Metrics import registry
+
+# --- LLM BACKEND POOL CONFIGURATION ---
+# Un ou plusieurs serveurs compatibles OpenAI, séparés par des virgules.
+# Suffixe optionnel '#N' : nombre maximum de requêtes simultanées sur ce serveur.
+LLM_URLS = [u.strip() for u in os.getenv("LLM_URL", "http://localhost:1234/v1").split(",") if u.strip()]
+LLM_BACKEND_MAX_CONCURRENCY = int(os.getenv("LLM_BACKEND_MAX_CONCURRENCY", "4"))
+# Durée d'éviction d'un serveur en erreur (secondes), sauf s'il répond avant au contrôle de santé
+LLM_EJECT_SECONDS = float(os.getenv("LLM_EJECT_SECONDS", "30"))
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "10"))
+LLM_HEALTH_TIMEOUT = float(os.getenv("LLM_HEALTH_TIMEOUT", "2"))
+
+# Errors meaning "this server is unreachable or broken", worth another backend.
+# Matched by name so the openai/httpx packages stay lazily imported.
+RETRYABLE_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailableError",
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError",
+}
+
+LLM_BACKEND_CALLS = registry.counter(
+    "smarthome_llm_backend_calls_total", "LLM calls per backend and outcome.", ["backend", "outcome"])
+
+def is_retryable(error):
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+class LLMBackend:
+    """One OpenAI-compatible server, with its own client and concurrency cap."""
+    def __init__(self, spec, factory, default_concurrency=LLM_BACKEND_MAX_CONCURRENCY):
+        url, _, cap = spec.partition("#")
+        self.url = url.rstrip("/")
+        self.max_concurrency = int(cap) if cap else default_concurrency
+        self.outstanding = 0
+        self.ejected_until = 0.0
+        self.failures = 0
+        self._factory = factory
+        self._client = None
+
+    @property
+    def client(self):
+        """LangChain chat model bound to this server, built on first use."""
+        if self._client is None:
+            self._client = self._factory(self.url)
+        return self._client
+
+    @property
+    def available(self):
+        return time.monotonic() >= self.ejected_until
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "max_concurrency": self.max_concurrency,
+            "available": self.available,
+            "failures": self.failures,
+        }
+
+class LLMPool:
+    """
+    Load-balanced set of interchangeable LLM servers.
+    Each call goes to the available backend with the fewest outstanding requests and
+    below its concurrency cap (callers wait when every backend is full). A backend
+    failing with a connection or server error is ejected for LLM_EJECT_SECONDS and the
+    call is retried on another one; periodic health checks bring it back early.
+    """
+    def __init__(self, urls, factory, eject_seconds=LLM_EJECT_SECONDS, health_interval=LLM_HEALTH_INTERVAL):
+        """
+        Args:
+            urls (list): Base URLs, each optionally suffixed with '#<max concurrency>'.
+            factory (callable): factory(base_url) returns a LangChain chat model.
+        """
+        self.backends = [LLMBackend(url, factory) for url in urls]
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self._condition = None
+        self._health_task = None
+
+    @property
+    def capacity(self):
+        """Total number of concurrent calls the backends accept."""
+        return sum(b.max_concurrency for b in self.backends)
+
+    # --- Backend selection ---
+
+    def _pick(self, exclude):
+        candidates = [b for b in self.backends if b not in exclude]
+        # Every backend ejected: trying one beats failing outright
+        live = [b for b in candidates if b.available] or candidates
+        free = [b for b in live if b.outstanding < b.max_concurrency]
+        if not free:
+            return None
+        return min(free, key=lambda b: (b.outstanding, b.outstanding / b.max_concurrency))
+
+    async def _acquire(self, exclude):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            while (backend := self._pick(exclude)) is None:
+                await self._condition.wait()
+            backend.outstanding += 1
+            return backend
+
+    async def _release(self, backend):
+        async with self._condition:
+            backend.outstanding -= 1
+            self._condition.notify_all()
+
+    def _eject(self, backend, error, outcome="error"):
+        backend.failures += 1
+        backend.ejected_until = time.monotonic() + self.eject_seconds
+        LLM_BACKEND_CALLS.inc(backend=backend.url, outcome=outcome)
+        print(f"⚠️ LLM backend {backend.url} ejected for {self.eject_seconds:.0f}s ({type(error).__name__}: {error})")
+
+    # --- Calls ---
+
+    async def run(self, call):
+        """
+        Awaits call(client) on the best backend, failing over to the others.
+
+        Args:
+            call (callable): Receives a chat model and returns the coroutine to await.
+        """
+        self._start_health_checks()
+        tried = set()
+        while True:
+            backend = await self._acquire(tried)
+            try:
+                result = await call(backend.client)
+                LLM_BACKEND_CALLS.inc(backend=backend.url, outcome="ok")
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                self._eject(backend, e)
+                tried.add(backend)
+                if len(tried) == len(self.backends):
+                    raise
+            finally:
+                await self._release(backend)
+
+    async def stream(self, call):
+        """
+        Streaming counterpart of run(): yields the chunks of call(client).
+        Failover only happens before the first chunk, never mid-answer.
+        """
+        self._start_health_checks()
+        tried = set()
+        while True:
+            backend = await self._acquire(tried)
+            started = False
+            try:
+                async for chunk in call(backend.client):
+                    started = True
+                    yield chunk
+                LLM_BACKEND_CALLS.inc(backend=backend.url, outcome="ok")
+                return
+            except Exception as e:
+                if started or not is_retryable(e):
+                    raise
+                self._eject(backend, e)
+                tried.add(backend)
+                if len(tried) == len(self.backends):
+                    raise
+            finally:
+                await self._release(backend)
+
+    # --- Health checks ---
+
+    def _start_health_checks(self):
+        if self._health_task is None and len(self.backends) > 1:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    def _probe(self, backend):
+        response = get_session().get(f"{backend.url}/models", timeout=LLM_HEALTH_TIMEOUT)
+        response.raise_for_status()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for backend in self.backends:
+                try:
+                    await asyncio.to_thread(self._probe, backend)
+                    if not backend.available:
+                        print(f"✅ LLM backend {backend.url} is back")
+                    backend.ejected_until = 0.0
+                except Exception as e:
+                    # A failed probe is not a failed user call: counted apart
+                    if backend.available:
+                        self._eject(backend, e, outcome="probe_error")
+
+    def stats(self):
+        return [b.stats() for b in self.backends]
@@ -1,13 +1,18 @@
 import os
+import re
 import uvicorn # pyright: ignore[reportMissingImports]
 import asyncio
 import json
-from typing import List
+import time
+import contextvars
+from typing import List, Optional
+from functools import lru_cache, partial
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, BackgroundTasks # pyright: ignore[reportMissingImports]
-from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware # pyright: ignore[reportMissingImports]
+from fastapi.responses import StreamingResponse, PlainTextResponse # pyright: ignore[reportMissingImports]
 
 # Local imports
 from .Tools import (
@@ -18,12 +23,25 @@ from .Tools import (
     compile_news_reports
 )  
 from .Agents import SmartAgent # pyright: ignore[reportMissingImports]
+from .Feeds import feed_fetcher
+from .Router import classify_intent, normalize
+from .LLMCache import llm_cache
+from .GoogleAuth import google_services
+from .Domotics import hue
+from .Actions import pending_actions, MemoryActionStore
+from .Prefetch import PrefetchScheduler, PREFETCH_ENABLED, PREFETCH_REQUESTED, PREFETCH_JOBS, UVICORN_WORKERS
+from .Metrics import (
+    registry, span, record_llm_usage, request_timings,
+    STAGE_LATENCY, TOOL_LATENCY, PROMPT_TOKENS, LLM_PROFILE_LATENCY
+)
+from .Prompts import build_budgeted_prompt, new_headlines, without_new_flags
+from .Headlines import headline_store
+from .Coalesce import SingleFlight
+from .LLMPool import LLMPool
+from .Profiles import MODEL_PROFILES, LLM_MODEL
 
 app = FastAPI(title="AI Home Assistant API")
 
-# Variable globale pour stocker l'action en attente de validation
-pending_action = {}
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -35,132 +53,690 @@ app.add_middleware(
 # --- DATA MODELS ---
 class UserRequest(BaseModel):
     instruction: str
+    session_id: Optional[str] = None
+    timings: bool = False   # joint le détail des temps par étape à la réponse
+
+# Taille maximale d'un lot et nombre d'instructions classées par appel au router LLM
+BATCH_MAX_INSTRUCTIONS = int(os.getenv("BATCH_MAX_INSTRUCTIONS", "16"))
+BATCH_ROUTER_CHUNK = int(os.getenv("BATCH_ROUTER_CHUNK", "8"))
+
+class BatchRequest(BaseModel):
+    instructions: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_INSTRUCTIONS)
+    session_id: Optional[str] = None
+    timings: bool = False
+
+class ActionRequest(BaseModel):
+    action_id: Optional[str] = None
+    session_id: Optional[str] = None
 
 # --- LLM CONFIGURATION ---
-llm = ChatOpenAI(
-    base_url="http://localhost:1234/v1",
-    api_key="lm-studio", 
-    model="ministral-3-3b",
-    temperature=0
-)
+# Un client par serveur LLM (et la pile langchain_openai) n'est construit qu'au premier usage.
+# Modèle, longueur et arrêt sont fixés à chaque appel par le profil (Src/Profiles.py).
+def make_llm_client(base_url, max_retries=2):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        base_url=base_url,
+        api_key="lm-studio", 
+        model=LLM_MODEL,
+        temperature=0,
+        stream_usage=True,
+        max_retries=max_retries
+    )
+
+@lru_cache(maxsize=None)
+def get_pool(urls):
+    """One pool per distinct set of servers, shared by every profile using it."""
+    # Avec plusieurs serveurs, la bascule vers un autre remplace les nouvelles tentatives
+    return LLMPool(list(urls), partial(make_llm_client, max_retries=0 if len(urls) > 1 else 2))
+
+def profile_pool(profile):
+    return get_pool(tuple(profile.urls))
+
+# Profil de chaque synthèse, par catégorie
+SUMMARY_PROFILES = {
+    "weather": "summary",
+    "personal": "briefing",
+    "news": "briefing",
+    "general": "summary",
+}
+
+# --- CONCURRENCY LIMITS ---
+# Nombre maximum de générations LLM simultanées (par défaut : capacité cumulée des serveurs)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", str(sum(
+    get_pool(urls).capacity for urls in {tuple(p.urls) for p in MODEL_PROFILES.values()}
+))))
+# Les outils restent synchrones : ils tournent dans un pool de threads borné.
+# Marge pour le préchauffage, le préchargement et les appels abandonnés après TOOL_TIMEOUT.
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "16"))
+
+llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+async def ask_llm(runnable, payload):
+    """Awaits an LLM call (raw model or SmartAgent) within the concurrency limit."""
+    stage = runnable.name if isinstance(runnable, SmartAgent) else "general"
+    profile = getattr(runnable, "profile", None)
+    async with llm_slots:
+        start = time.perf_counter()
+        response = await runnable.ainvoke(payload)
+    if profile is not None:
+        LLM_PROFILE_LATENCY.observe(time.perf_counter() - start, profile=profile.name, model=profile.model)
+    # Un agent envoie aussi son prompt système et les schémas de ses outils
+    record_llm_usage(stage, runnable.prompt_chars(payload) if isinstance(runnable, SmartAgent) else payload, response)
+    return response
+
+async def run_tool(tool_fn, args):
+    """Runs a synchronous @tool in the bounded thread pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    # Le contexte est copié pour que les mesures faites dans l'outil rejoignent la requête
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(tool_executor, ctx.run, tool_fn.invoke, args)
 
 # --- AGENT ORCHESTRATION ---
-router_agent = SmartAgent(
-    llm, 
-    "Router", 
-    "You are a professional dispatcher. Categorize the user's request. "
-    "If the user asks for NEWS, REPORTS, EMAILS or CALENDAR, you MUST respond with 'PERSONAL_AGENT'. "
-    "If the user asks for climate, weather, or temperature, you MUST respond with 'WEATHER_AGENT'. "
-    "If the user asks for lights, home appliances, you MUST respond with 'DOMO_AGENT'. "
-    "Otherwise, respond with 'GENERAL'. Do not explain. Just one word."
-)
+# Routage local déterministe avant l'appel au router LLM (désactivable)
+FAST_ROUTING = os.getenv("FAST_ROUTING", "1") == "1"
 
-domo_agent = SmartAgent(
-    llm, 
-    "HomeAutomation", 
-    "You are a home automation expert. Use the 'control_lights' tool for any light requests.", 
-    tools=[control_lights]
-)
+# Agents spécialisés : (nom, prompt système, outils, profil), construits au premier usage
+AGENT_SPECS = {
+    "router": (
+        "Router", 
+        "You are a professional dispatcher. Categorize the user's request. "
+        "If the user asks for NEWS, REPORTS, EMAILS or CALENDAR, you MUST respond with 'PERSONAL_AGENT'. "
+        "If the user asks for climate, weather, or temperature, you MUST respond with 'WEATHER_AGENT'. "
+        "If the user asks for lights, home appliances, you MUST respond with 'DOMO_AGENT'. "
+        "Otherwise, respond with 'GENERAL'. Do not explain. Just one word.",
+        None,
+        "router"
+    ),
+    "batch_router": (
+        "BatchRouter",
+        "You are a professional dispatcher. Categorize each numbered user request. "
+        "NEWS, REPORTS, EMAILS or CALENDAR requests are 'PERSONAL_AGENT'. "
+        "Climate, weather or temperature requests are 'WEATHER_AGENT'. "
+        "Lights or home appliances requests are 'DOMO_AGENT'. "
+        "Anything else is 'GENERAL'. Answer one line per request, formatted '<number>: <CATEGORY>'. Do not explain.",
+        None,
+        "router_batch"
+    ),
+    "domo": (
+        "HomeAutomation", 
+        "You are a home automation expert. Use the 'control_lights' tool for any light requests. "
+        "Use location 'ALL' when every light of the home is concerned.", 
+        [control_lights],
+        "agent"
+    ),
+    "weather": (
+        "WeatherExpert", 
+        "Expert in weather. You MUST use 'get_weather_forecast' and provide the 'location' argument if mentioned.", 
+        [get_weather_forecast],
+        "agent"
+    ),
+    "news": (
+        "NewsAnalyst", 
+        "Expert in news aggregation. Call every tool the request needs (calendar, emails, news) in the same answer.",
+        [get_daily_calendar, summarize_recent_emails, compile_news_reports],
+        "agent"
+    ),
+}
 
-weather_agent = SmartAgent(
-    llm, 
-    "WeatherExpert", 
-    "Expert in weather. You MUST use 'get_weather_forecast' and provide the 'location' argument if mentioned.", 
-    tools=[get_weather_forecast]
-)
+@lru_cache(maxsize=None)
+def get_agent(role):
+    """Builds (once) the SmartAgent for a role of AGENT_SPECS."""
+    name, system_prompt, tools, profile_name = AGENT_SPECS[role]
+    profile = MODEL_PROFILES[profile_name]
+    return SmartAgent(profile_pool(profile), name, system_prompt, tools=tools, profile=profile)
 
-news_agent = SmartAgent(
-    llm, 
-    "NewsAnalyst", 
-    "Expert in news aggregation.",
-    tools=[get_daily_calendar, summarize_recent_emails, compile_news_reports]
-)
+# --- STARTUP ---
+# Le préchauffage tourne en tâche de fond : le serveur accepte déjà les connexions
+WARM_UP = os.getenv("WARM_UP", "1") == "1"
 
-# --- API ROUTES ---
+def warm_up():
+    """Loads the heavy dependencies and clients ahead of the first request."""
+    start = time.perf_counter()
+    steps = [
+        ("agents", lambda: [get_agent(role) for role in AGENT_SPECS]),
+        ("llm_clients", lambda: [b.client for p in MODEL_PROFILES.values() for b in profile_pool(p).backends]),
+        ("feedparser", lambda: __import__("feedparser")),
+        ("hue", hue.start),
+        ("google", lambda: google_services.warm_up(("calendar", "v3"), ("gmail", "v1"))),
+        # Met en cache la météo du domicile pour le bouton "Météo Locale"
+        ("home_forecast", lambda: get_weather_forecast.invoke({})),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up step '{name}' failed: {e}")
+    print(f"Warm-up done in {time.perf_counter() - start:.2f}s")
 
-@app.post("/ask-agent")
-async def ask_agent(request: UserRequest):
-    global pending_action
+@app.on_event("startup")
+async def schedule_warm_up():
+    if WARM_UP:
+        asyncio.get_running_loop().run_in_executor(tool_executor, warm_up)
+
+# --- TOOL DISPATCH ---
+TOOLS = {t.name: t for t in [control_lights, get_weather_forecast, get_daily_calendar, summarize_recent_emails, compile_news_reports]}
+# Outils exécutés uniquement après validation humaine
+CONFIRMATION_TOOLS = {"control_lights"}
+# Délai maximum par outil (secondes)
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "20"))
+
+# Mise en forme de chaque résultat d'outil dans le prompt de synthèse
+TOOL_SECTIONS = {
+    "get_weather_forecast": "Weather Data: {data}",
+    "get_daily_calendar": "Personal Data (calendar): {data}",
+    "summarize_recent_emails": "Personal Data (emails): {data}",
+    "compile_news_reports": "RAW RSS DATA:\n{data}",
+}
+
+# Catégorie de cache LLM de chaque outil (la plus courte durée de vie l'emporte)
+TOOL_CACHE_CATEGORIES = {
+    "get_weather_forecast": "weather",
+    "get_daily_calendar": "personal",
+    "summarize_recent_emails": "personal",
+    "compile_news_reports": "news",
+}
+
+# --- PIPELINE ---
+# Le pipeline émet des événements : "routing", "tool", "token" puis un "done" final.
+# /ask-agent n'en garde que le dernier, /ask-agent/stream les relaie en SSE.
+
+def event(name, data):
+    return {"event": name, "data": data}
+
+async def summarize(prompt, details, extra=None, category="general", cache_key=None):
+    """
+    Streams a summary from the LLM, token by token, then emits the final answer.
+    Identical prompts are answered from the LLM result cache without any generation;
+    `cache_key` replaces the prompt as the cache key when parts of it must not count.
+    """
+    profile = MODEL_PROFILES[SUMMARY_PROFILES.get(category, "summary")]
+    cache_key = cache_key or prompt
+    cached = llm_cache.get(profile.model, profile.temperature, cache_key, category)
+    if cached is not None:
+        yield event("token", cached)
+        yield event("done", {"response": cached, "details": details + ["LLM cache hit"], **(extra or {})})
+        return
+
+    parts = []
+    usage = None
+    start = time.perf_counter()
+    async with llm_slots:
+        async for chunk in profile_pool(profile).stream(lambda model: model.astream(prompt, **profile.call_kwargs())):
+            usage = chunk if getattr(chunk, "usage_metadata", None) else usage
+            if chunk.content:
+                parts.append(chunk.content)
+                yield event("token", chunk.content)
+    elapsed = time.perf_counter() - start
+    STAGE_LATENCY.observe(elapsed, stage="summarize", agent=category)
+    LLM_PROFILE_LATENCY.observe(elapsed, profile=profile.name, model=profile.model)
+    timings = request_timings.get()
+    if timings is not None:
+        timings.append({"stage": "summarize", "agent": category, "ms": round(elapsed * 1000, 1)})
+    record_llm_usage("summarize", prompt, usage)
+    response = "".join(parts)
+    llm_cache.set(profile.model, profile.temperature, cache_key, response, category)
+    yield event("done", {"response": response, "details": details, **(extra or {})})
+
+# --- COALESCING ---
+# Les requêtes et appels d'outils identiques déjà en cours sont partagés
+COALESCING = os.getenv("COALESCING", "1") == "1"
+request_flights = SingleFlight("request")
+tool_flights = SingleFlight("tool")
+
+async def execute_tool_call(tool_call):
+    """
+    Runs one tool call requested by an agent, bounded by TOOL_TIMEOUT.
+    Concurrent calls of the same tool with the same arguments share one execution.
+    """
+    tool_name = tool_call["name"]
+    tool_fn = TOOLS.get(tool_name)
+    if tool_fn is None:
+        return f"Unknown tool: {tool_name}"
+    args = tool_call.get("args") or {}
+    if not COALESCING or tool_name in CONFIRMATION_TOOLS:
+        return await _execute_tool(tool_name, tool_fn, args)
+    key = (tool_name, json.dumps(args, sort_keys=True, default=str))
+    return await tool_flights.run(key, lambda: _execute_tool(tool_name, tool_fn, args))
+
+# Threads of timed-out tools still running: wait_for only abandons them
+abandoned_tool_threads = 0
+
+def _release_abandoned(_):
+    global abandoned_tool_threads
+    abandoned_tool_threads -= 1
+
+async def _execute_tool(tool_name, tool_fn, args):
+    global abandoned_tool_threads
+    future = asyncio.ensure_future(run_tool(tool_fn, args))
+    try:
+        with span(TOOL_LATENCY, tool=tool_name):
+            return await asyncio.wait_for(asyncio.shield(future), TOOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        abandoned_tool_threads += 1
+        future.add_done_callback(_release_abandoned)
+        print(f"⚠️ {tool_name} abandoned after {TOOL_TIMEOUT}s; "
+              f"{abandoned_tool_threads}/{TOOL_MAX_WORKERS} tool threads still busy with abandoned calls")
+        return f"{tool_name} Error: no answer after {TOOL_TIMEOUT}s"
+    except Exception as e:
+        return f"{tool_name} Error: {str(e)}"
+
+def build_summary_prompt(instruction, calls, results, category="general"):
+    """
+    Merges every tool result into a single summarization prompt, trimmed to the
+    category's token budget. Sections always come in TOOL_SECTIONS order so that
+    prompts for the same tools share their prefix.
+    """
+    today = datetime.now().strftime('%Y-%m-%d')
+    order = list(TOOL_SECTIONS)
+    sections = sorted(
+        ((c["name"], TOOL_SECTIONS.get(c["name"], c["name"] + " Data: {data}"), data) for c, data in zip(calls, results)),
+        key=lambda s: order.index(s[0]) if s[0] in order else len(order)
+    )
+    prompt, before, after = build_budgeted_prompt(
+        f"CONTEXT: Today is {today}.",
+        sections,
+        f"Summarize this data correctly to answer the user: {instruction}",
+        category
+    )
+    PROMPT_TOKENS.observe(before, agent=category, phase="raw")
+    PROMPT_TOKENS.observe(after, agent=category, phase="budgeted")
+    return prompt, before, after
+
+async def agent_events(instruction, session_id=None, routing_decision=None):
+    """
+    Runs the full router -> agent -> tool -> summary pipeline for one instruction.
+    
+    Args:
+        instruction (str): The raw user request.
+        session_id (str, optional): Client session owning any action left for validation.
+        routing_decision (str, optional): Agent already chosen (batch routing), skips step 1.
+    Yields:
+        dict: Events with an 'event' name and a JSON-serializable 'data' payload.
+    """
     execution_details = []
     
-    # Étape 1 : Routage
-    routing_decision = router_agent.invoke(request.instruction).content.upper().strip()
+    # Étape 1 : Routage (classifieur local, puis LLM si incertain)
+    if routing_decision:
+        execution_details.append(f"Batch routing: {routing_decision}")
+    else:
+        with span(STAGE_LATENCY, stage="route", agent="fast_path"):
+            routing_decision, confidence = classify_intent(instruction) if FAST_ROUTING else (None, 0.0)
+        if routing_decision:
+            execution_details.append(f"Fast routing: {routing_decision} ({confidence})")
+    if not execution_details:
+        router_agent = get_agent("router")
+        with span(STAGE_LATENCY, stage="route", agent=router_agent.name):
+            routing_decision = (await ask_llm(router_agent, instruction)).content.upper().strip()
+    yield event("routing", {"decision": routing_decision, "fast_path": bool(execution_details)})
 
     # Étape 2 : Sélection de l'agent
     if "WEATHER_AGENT" in routing_decision:
-        active_agent = weather_agent
+        active_agent = get_agent("weather")
     elif "DOMO_AGENT" in routing_decision:
-        active_agent = domo_agent
+        active_agent = get_agent("domo")
     elif "PERSONAL_AGENT" in routing_decision:
-        active_agent = news_agent
+        active_agent = get_agent("news")
     else:
-        response = llm.invoke(request.instruction)
-        return {"response": response.content, "details": ["General processing"]}
+        async for e in summarize(instruction, execution_details + ["General processing"]):
+            yield e
+        return
 
     # Étape 3 : Invocation de l'agent
-    agent_response = active_agent.invoke(request.instruction)
+    with span(STAGE_LATENCY, stage="agent", agent=active_agent.name):
+        agent_response = await ask_llm(active_agent, instruction)
     
     # Étape 4 : Gestion des outils
     if agent_response.tool_calls:
-        for tool_call in agent_response.tool_calls:
-            tool_name = tool_call["name"]
-            
-            # --- INTERCEPTION SÉCURITÉ : DOMOTIQUE ---
-            if tool_name == "control_lights":
-                pending_action = {
-                    "tool": "control_lights",
-                    "args": tool_call["args"]
-                }
-                return {
-                    "response": f"J'ai préparé une commande pour vos lumières : {tool_call['args']}. Veuillez confirmer.",
-                    "needs_validation": True,
-                    "action_details": tool_call["args"],
+        # --- INTERCEPTION SÉCURITÉ : DOMOTIQUE ---
+        # Les outils à confirmer sont mis de côté, les autres partent tous en parallèle
+        gated = [c for c in agent_response.tool_calls if c["name"] in CONFIRMATION_TOOLS]
+        calls = [c for c in agent_response.tool_calls if c["name"] not in CONFIRMATION_TOOLS]
+
+        validation = {}
+        if gated:
+            # Magasin SQLite partagé (verrous entre workers) : hors de la boucle d'événements
+            action_id = await asyncio.get_running_loop().run_in_executor(
+                tool_executor, pending_actions.put, [{"tool": c["name"], "args": c["args"]} for c in gated], session_id)
+            action_details = gated[0]["args"] if len(gated) == 1 else [c["args"] for c in gated]
+            validation = {"needs_validation": True, "action_id": action_id, "action_details": action_details}
+            if not calls:
+                yield event("done", {
+                    "response": f"J'ai préparé une commande pour vos lumières : {action_details}. Veuillez confirmer.",
+                    **validation,
                     "details": ["Waiting for human validation"]
-                }
-            
-            # --- LOGIQUE MÉTÉO (CORRIGÉE) ---
-            elif tool_name == "get_weather_forecast":
-                # Extraction de la localisation depuis les arguments de l'IA
-                location_arg = tool_call.get("args", {}).get("location")
-                
-                # Appel de l'outil avec l'argument dynamique
-                data = get_weather_forecast.invoke({"location": location_arg})
-                
-                final = llm.invoke(f"Weather Data: {data}. Answer the user: {request.instruction}")
-                return {"response": final.content, "details": [f"Weather checked for {location_arg or 'Home'}"]}
-            
-            # --- LOGIQUE CALENDRIER / MAILS ---
-            elif tool_name in ["get_daily_calendar", "summarize_recent_emails"]:
-                data = get_daily_calendar.invoke({}) if "calendar" in tool_name else summarize_recent_emails.invoke({})
-                final = llm.invoke(f"Personal Data: {data}. Summarize this for the user.")
-                return {"response": final.content, "details": [f"Source: {tool_name}"]}
-            
-            # --- LOGIQUE NEWS ---
-            elif tool_name == "compile_news_reports":
-                raw_news = compile_news_reports.invoke(tool_call["args"])
-                today = datetime.now().strftime('%Y-%m-%d')
-                news_prompt = f"CONTEXT: Today is {today}.\nRAW RSS DATA:\n{raw_news}\n\nSummarize correctly."
-                final_news = llm.invoke(news_prompt)
-                return {"response": final_news.content, "details": ["News review completed"]}
-        
-        return {"response": "Tâches terminées.", "details": execution_details}
+                })
+                return
+
+        for tool_call in calls:
+            yield event("tool", {"name": tool_call["name"], "status": "running"})
+
+        async def timed(index, tool_call):
+            start = time.perf_counter()
+            result = await execute_tool_call(tool_call)
+            return index, result, time.perf_counter() - start
+
+        results = [None] * len(calls)
+        for finished in asyncio.as_completed([timed(i, c) for i, c in enumerate(calls)]):
+            index, result, elapsed = await finished
+            results[index] = result
+            execution_details.append(f"{calls[index]['name']} ({elapsed:.2f}s)")
+            yield event("tool", {"name": calls[index]["name"], "status": "done"})
+
+        # Une seule synthèse pour l'ensemble des résultats
+        if gated:
+            execution_details.append("Waiting for human validation")
+        category = min(
+            (TOOL_CACHE_CATEGORIES.get(c["name"], "general") for c in calls),
+            key=lambda name: llm_cache.ttls.get(name, 0)
+        )
+        prompt, before, after = build_summary_prompt(instruction, calls, results, category)
+        execution_details.append(f"Summary prompt: ~{before} -> ~{after} tokens")
+        extra, cache_key = dict(validation), None
+        if any(c["name"] == "compile_news_reports" for c in calls):
+            # Sujets NEW restés dans le prompt : marqués "rapportés" à la livraison seulement.
+            # Les drapeaux NEW changent alors : ils restent hors de la clé du cache LLM.
+            extra["reported_stories"] = new_headlines(prompt)
+            cache_key = without_new_flags(prompt)
+        async for e in summarize(prompt, execution_details, extra, category, cache_key):
+            yield e
+        return
     
-    return {"response": agent_response.content, "details": [f"Handled by {active_agent.name}"]}
+    yield event("done", {"response": agent_response.content, "details": [f"Handled by {active_agent.name}"]})
+
+async def deliver(data):
+    """
+    Final step before an answer leaves for a client: flags the news stories it reports.
+    Prefetch runs and the warm-up never get here, so they leave the NEW flags alone.
+    """
+    titles = data.pop("reported_stories", None)
+    if titles:
+        try:
+            await asyncio.get_running_loop().run_in_executor(tool_executor, headline_store.mark_reported, titles)
+        except Exception as e:
+            print(f"Could not flag reported stories ({e})")
+    return data
+
+# --- PREFETCH ---
+# Requêtes interactives en cours : le préchargement ne sollicite le LLM qu'à vide
+active_requests = 0
+
+async def prefetch_answer(instruction):
+    """Runs the whole pipeline for a quick-action prompt and returns its final payload."""
+    async for e in agent_events(instruction):
+        if e["event"] == "done":
+            return e["data"]
+
+async def prefetch_tool(tool_name):
+    await execute_tool_call({"name": tool_name, "args": {}})
+
+prefetcher = PrefetchScheduler(
+    PREFETCH_JOBS,
+    refresh_tool=prefetch_tool,
+    generate=prefetch_answer,
+    is_idle=lambda: active_requests == 0 and not llm_slots.locked(),
+    # Sans token.json, un appel Google lancerait le flux OAuth interactif en arrière-plan
+    can_run=lambda job: not job.get("google") or google_services.authorized
+)
+
+@app.on_event("startup")
+async def start_prefetch():
+    if PREFETCH_ENABLED:
+        prefetcher.start()
+    elif PREFETCH_REQUESTED:
+        print(f"⚠️ Prefetch disabled: it needs a single worker (UVICORN_WORKERS={UVICORN_WORKERS})")
+
+async def traced_events(request):
+    """
+    Wraps the pipeline and attaches the per-stage timing breakdown to the final event.
+    Quick-action prompts with a fresh precomputed answer are served without running it.
+    """
+    global active_requests
+    timings = [] if request.timings else None
+    request_timings.set(timings)
+    start = time.perf_counter()
+    prefetched = prefetcher.lookup(request.instruction) if PREFETCH_ENABLED else None
+    if prefetched is not None:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage="total", agent="prefetch")
+        prefetched["details"] = prefetched.get("details", []) + [f"Prefetched at {prefetched['freshness']['generated_at']}"]
+        yield event("token", prefetched["response"])
+        yield event("done", await deliver(prefetched))
+        return
+
+    active_requests += 1
+    try:
+        key = coalescing_key(request.instruction, request.session_id) if COALESCING else None
+        if key is None:
+            events = agent_events(request.instruction, request.session_id)
+        else:
+            events = request_flights.stream(key, lambda: shared_agent_events(request.instruction, request.session_id))
+        async for e in events:
+            if e["event"] == "done":
+                STAGE_LATENCY.observe(time.perf_counter() - start, stage="total", agent="")
+                # Le payload est partagé entre requêtes coalescées : chacune reçoit sa copie
+                e = event("done", await deliver(dict(e["data"])))
+                if timings is not None:
+                    # Exécution partagée : les mesures viennent du payload, pas de cette requête
+                    e["data"]["timings"] = e["data"].get("timings", timings)
+                else:
+                    e["data"].pop("timings", None)
+            yield e
+    finally:
+        active_requests -= 1
+
+def coalescing_key(instruction, session_id):
+    """
+    Identity of a request for coalescing, or None when it must run on its own.
+    Light commands (confirmation-gated) are never shared. When the fast path cannot
+    tell the agent, the request may still turn out to be a light command, so only
+    requests of the same session are merged, and anonymous ones are not merged at all:
+    an action left for validation only ever reaches the session that asked for it.
+    """
+    decision, _ = classify_intent(instruction) if FAST_ROUTING else (None, 0.0)
+    if decision == "DOMO_AGENT":
+        return None
+    if decision is None and session_id is None:
+        return None
+    return (" ".join(normalize(instruction)), None if decision else session_id)
+
+async def shared_agent_events(instruction, session_id):
+    """
+    Pipeline run shared by coalesced requests. It records its own stage timings and
+    puts them in the done payload, so followers get them as well as the leader.
+    """
+    run_timings = []
+    # Contexte propre à la tâche de diffusion : n'affecte pas la requête meneuse
+    request_timings.set(run_timings)
+    async for e in agent_events(instruction, session_id):
+        if e["event"] == "done":
+            e = event("done", dict(e["data"], timings=run_timings))
+        yield e
+
+# --- BATCH ---
+# Plusieurs instructions d'un coup (scénarios, automatisations) : le router LLM les classe
+# par paquets de BATCH_ROUTER_CHUNK, pour que max_tokens du profil router_batch suffise
+ROUTER_LABELS = {"PERSONAL_AGENT", "WEATHER_AGENT", "DOMO_AGENT", "GENERAL"}
+
+async def route_chunk(instructions):
+    """Classifies a few instructions in one router_batch call; unlabelled ones map to None."""
+    router_agent = get_agent("batch_router")
+    numbered = "\n".join(f"{k + 1}. {instruction}" for k, instruction in enumerate(instructions))
+    with span(STAGE_LATENCY, stage="route", agent=router_agent.name):
+        answer = (await ask_llm(router_agent, numbered)).content.upper()
+    labels = {int(num): label for num, label in re.findall(r"(\d+)\s*[:.)-]\s*([A-Z_]+)", answer)}
+    return [labels.get(k + 1) if labels.get(k + 1) in ROUTER_LABELS else None for k in range(len(instructions))]
+
+async def route_one(instruction):
+    """Single-instruction router call, for what the batch answer left out."""
+    router_agent = get_agent("router")
+    with span(STAGE_LATENCY, stage="route", agent=router_agent.name):
+        return (await ask_llm(router_agent, instruction)).content.upper().strip()
+
+async def route_batch(instructions):
+    """
+    Returns one routing decision per instruction: fast path first, then one router LLM
+    call per BATCH_ROUTER_CHUNK uncertain instructions. An instruction the batch answer
+    skips or mislabels gets its own router call rather than a default agent, so a light
+    command never bypasses confirmation by falling into GENERAL.
+    """
+    decisions = [classify_intent(i)[0] if FAST_ROUTING else None for i in instructions]
+    uncertain = [n for n, decision in enumerate(decisions) if decision is None]
+    chunks = [uncertain[i:i + BATCH_ROUTER_CHUNK] for i in range(0, len(uncertain), BATCH_ROUTER_CHUNK)]
+    labelled = await asyncio.gather(*(route_chunk([instructions[n] for n in chunk]) for chunk in chunks))
+    for chunk, labels in zip(chunks, labelled):
+        for n, label in zip(chunk, labels):
+            decisions[n] = label
+    missing = [n for n in uncertain if decisions[n] is None]
+    for n, label in zip(missing, await asyncio.gather(*(route_one(instructions[n]) for n in missing))):
+        decisions[n] = label
+    return decisions
+
+async def batch_answer(instruction, session_id, routing_decision):
+    prefetched = prefetcher.lookup(instruction) if PREFETCH_ENABLED else None
+    if prefetched is not None:
+        return prefetched
+    async for e in agent_events(instruction, session_id, routing_decision):
+        if e["event"] == "done":
+            return e["data"]
+
+# --- API ROUTES ---
+
+@app.post("/ask-agent")
+async def ask_agent(request: UserRequest):
+    async for e in traced_events(request):
+        if e["event"] == "done":
+            return e["data"]
+
+# Variante streaming : événements SSE (routage, outils, puis tokens du résumé)
+@app.post("/ask-agent/stream")
+async def ask_agent_stream(request: UserRequest):
+    async def sse():
+        try:
+            async for e in traced_events(request):
+                yield f"event: {e['event']}\ndata: {json.dumps(e['data'], ensure_ascii=False)}\n\n"
+        except Exception as e:
+            # Événement terminal : le client n'attend pas un "done" qui ne viendra jamais
+            print(f"Streaming pipeline failed: {e}")
+            yield f"event: error\ndata: {json.dumps({'response': f'Erreur : {e}'}, ensure_ascii=False)}\n\n"
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Lot d'instructions : routage groupé, exécution concurrente, actions à confirmer à part
+@app.post("/ask-agent/batch")
+async def ask_agent_batch(request: BatchRequest):
+    global active_requests
+    timings = [] if request.timings else None
+    request_timings.set(timings)
+    start = time.perf_counter()
+    active_requests += 1
+    try:
+        decisions = await route_batch(request.instructions)
+        # Une instruction en échec n'emporte pas les autres
+        answers = await asyncio.gather(*(
+            batch_answer(instruction, request.session_id, decision)
+            for instruction, decision in zip(request.instructions, decisions)
+        ), return_exceptions=True)
+    finally:
+        active_requests -= 1
+    STAGE_LATENCY.observe(time.perf_counter() - start, stage="total", agent="batch")
+
+    results, groups, pending = [], {}, []
+    for index, (instruction, decision, data) in enumerate(zip(request.instructions, decisions, answers)):
+        groups.setdefault(decision, []).append(index)
+        if isinstance(data, Exception):
+            print(f"Batch instruction {index} failed: {data}")
+            results.append({"instruction": instruction, "agent": decision, "response": f"Erreur : {data}", "success": False})
+            continue
+        data = await deliver(dict(data))
+        if data.pop("needs_validation", False):
+            pending.append({
+                "index": index,
+                "instruction": instruction,
+                "action_id": data.pop("action_id"),
+                "action_details": data.pop("action_details"),
+            })
+        results.append({"instruction": instruction, "agent": decision, **data})
+    response = {"results": results, "groups": groups, "pending_actions": pending}
+    if timings is not None:
+        response["timings"] = timings
+    return response
+
+async def pop_pending_action(request):
+    """Takes the pending calls of an action, off the event loop (SQLite may wait on a lock)."""
+    return await asyncio.get_running_loop().run_in_executor(
+        tool_executor, pending_actions.pop, request.action_id, request.session_id)
+
+@app.on_event("startup")
+async def check_action_store():
+    if UVICORN_WORKERS > 1 and isinstance(pending_actions, MemoryActionStore):
+        print(f"⚠️ Pending actions kept in memory with UVICORN_WORKERS={UVICORN_WORKERS}: "
+              "/confirm-action may reach another worker, set PENDING_ACTION_DB")
 
 # NOUVELLE ROUTE : Confirmation de l'action en attente
+# Sans action_id, la dernière action de la session est confirmée
 @app.post("/confirm-action")
-async def confirm_action():
-    global pending_action
-    if not pending_action:
+async def confirm_action(request: Optional[ActionRequest] = None):
+    request = request or ActionRequest()
+    calls = await pop_pending_action(request)
+    if not calls:
         return {"response": "Aucune action en attente.", "success": False}
     
     try:
-        if pending_action["tool"] == "control_lights":
-            res = control_lights.invoke(pending_action["args"])
-            pending_action = {} # Reset
-            return {"response": f"Action exécutée : {res}", "success": True}
+        results = await asyncio.gather(*(run_tool(TOOLS[c["tool"]], c["args"]) for c in calls))
+        return {"response": f"Action exécutée : {' '.join(results)}", "success": True}
     except Exception as e:
         return {"response": f"Erreur : {str(e)}", "success": False}
 
+@app.post("/cancel-action")
+async def cancel_action(request: Optional[ActionRequest] = None):
+    request = request or ActionRequest()
+    calls = await pop_pending_action(request)
+    return {"response": "Action annulée." if calls else "Aucune action en attente.", "success": bool(calls)}
+
+# Sonde de disponibilité : ne dépend d'aucun client lourd
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+# Statistiques du cache des flux RSS
+@app.get("/stats/news")
+async def news_stats():
+    return {"feeds": feed_fetcher.stats()}
+
+# Taux de succès du cache des synthèses LLM
+@app.get("/stats/llm-cache")
+async def llm_cache_stats():
+    return llm_cache.stats()
+
+# Requêtes et appels d'outils partagés avec un calcul déjà en cours
+@app.get("/stats/coalescing")
+async def coalescing_stats():
+    return {"requests": request_flights.stats(), "tools": tool_flights.stats()}
+
+# Charge et disponibilité de chaque serveur LLM
+@app.get("/stats/llm-backends")
+async def llm_backend_stats():
+    return {
+        "profiles": {
+            name: {"model": p.model, "servers": p.urls, "max_tokens": p.max_tokens, "stop": p.stop}
+            for name, p in MODEL_PROFILES.items()
+        },
+        "pools": [{"servers": list(urls), "backends": get_pool(urls).stats()}
+                  for urls in {tuple(p.urls) for p in MODEL_PROFILES.values()}],
+    }
+
+# Réponses préchargées des actions rapides
+@app.get("/stats/prefetch")
+async def prefetch_stats():
+    return prefetcher.stats
+
+# Métriques Prometheus (latences par étape, par agent et par outil)
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,146 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# --- METRICS ---
+# Minimal Prometheus text-format registry (no external dependency).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+def _escape(value):
+    # Label values may contain anything (URLs, agent names): escape as the text format requires
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + body + "}"
+
+class Counter:
+    """Monotonic counter with labels."""
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative histogram with labels, rendered with _bucket/_sum/_count series."""
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {round(series[-2], 6)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+STAGE_LATENCY = registry.histogram(
+    "smarthome_stage_seconds", "Latency of each /ask-agent stage.", ["stage", "agent"])
+TOOL_LATENCY = registry.histogram(
+    "smarthome_tool_seconds", "Latency of each tool call.", ["tool"])
+TOOL_STEP_LATENCY = registry.histogram(
+    "smarthome_tool_step_seconds", "Latency of the network steps inside tools.", ["tool", "step"])
+LLM_TOKENS = registry.counter(
+    "smarthome_llm_tokens_total", "Tokens reported by the LLM server.", ["stage", "kind"])
+LLM_PROMPT_CHARS = registry.histogram(
+    "smarthome_llm_prompt_chars", "Size of the prompts sent to the LLM.", ["stage"], buckets=SIZE_BUCKETS)
+LLM_PROFILE_LATENCY = registry.histogram(
+    "smarthome_llm_profile_seconds", "Latency of LLM calls per model profile.", ["profile", "model"])
+PROMPT_TOKENS = registry.histogram(
+    "smarthome_summary_prompt_tokens", "Estimated summary prompt tokens before and after budgeting.",
+    ["agent", "phase"], buckets=SIZE_BUCKETS)
+
+# Per-request timing breakdown, filled by spans when a request asked for it
+request_timings = ContextVar("request_timings", default=None)
+
+@contextmanager
+def span(histogram, **labels):
+    """
+    Times the enclosed block into `histogram` and, when enabled for the current
+    request, appends it to the request's timing breakdown.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.append({**labels, "ms": round(elapsed * 1000, 1)})
+
+def record_llm_usage(stage, prompt, message):
+    """
+    Records prompt size and, when the server reports them, token counts.
+
+    Args:
+        stage (str): Pipeline stage label.
+        prompt (str | int): Prompt sent to the model, or its size in characters.
+        message: Model response, read for its usage metadata.
+    """
+    LLM_PROMPT_CHARS.observe(prompt if isinstance(prompt, int) else len(prompt), stage=stage)
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        LLM_TOKENS.inc(usage["input_tokens"], stage=stage, kind="prompt")
+    if usage.get("output_tokens"):
+        LLM_TOKENS.inc(usage["output_tokens"], stage=stage, kind="completion")
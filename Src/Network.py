@@ -0,0 +1,28 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- HTTP CONFIGURATION ---
+# Timeout (secondes) appliqué à tous les appels sortants
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Returns the process-wide keep-alive HTTP session.
+    Connections are pooled per host so repeated API calls skip the TCP/TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
@@ -0,0 +1,158 @@
+import os
+import time
+import asyncio
+from datetime import datetime
+
+from .Router import normalize
+
+# --- PREFETCH CONFIGURATION ---
+# Les réponses préchargées et le compteur de requêtes actives sont propres à un processus :
+# avec plusieurs workers Uvicorn, chacun préchargerait pour lui seul. Le préchargement
+# n'est donc actif qu'avec un seul worker (UVICORN_WORKERS, comme dans le Dockerfile).
+UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", "1"))
+PREFETCH_REQUESTED = os.getenv("PREFETCH", "1") == "1"
+PREFETCH_ENABLED = PREFETCH_REQUESTED and UVICORN_WORKERS == 1
+# Pré-génère aussi les synthèses LLM (sinon seules les données des outils sont rafraîchies)
+PREFETCH_SUMMARIES = os.getenv("PREFETCH_SUMMARIES", "1") == "1"
+# Plage horaire sans préchargement, ex. "23-6" (vide = jamais)
+PREFETCH_QUIET_HOURS = os.getenv("PREFETCH_QUIET_HOURS", "23-6")
+# Attente maximale d'un LLM libre avant de reporter une pré-génération (secondes)
+PREFETCH_IDLE_WAIT = float(os.getenv("PREFETCH_IDLE_WAIT", "60"))
+
+# Dashboard quick actions: same prompts as Src/Dashboard.py
+PREFETCH_JOBS = [
+    {
+        "name": "news",
+        "prompt": "Fais-moi une compilation des dernières actualités mondiales.",
+        "tool": "compile_news_reports",
+        "interval": int(os.getenv("PREFETCH_NEWS_INTERVAL", "900")),
+    },
+    {
+        "name": "calendar",
+        "prompt": "Mon calendrier  ?",
+        "tool": "get_daily_calendar",
+        "google": True,
+        "interval": int(os.getenv("PREFETCH_CALENDAR_INTERVAL", "600")),
+    },
+    {
+        "name": "emails",
+        "prompt": "Peux-tu me résumer mes nouveaux emails ?",
+        "tool": "summarize_recent_emails",
+        "google": True,
+        "interval": int(os.getenv("PREFETCH_EMAILS_INTERVAL", "300")),
+    },
+    {
+        "name": "weather",
+        "prompt": "Quel temps fait-il aujourd'hui ?",
+        "tool": "get_weather_forecast",
+        "interval": int(os.getenv("PREFETCH_WEATHER_INTERVAL", "900")),
+    },
+]
+
+def in_quiet_hours(spec=PREFETCH_QUIET_HOURS, now=None):
+    """True when the current hour falls in the 'start-end' range (wrapping past midnight)."""
+    if not spec:
+        return False
+    start, end = (int(h) for h in spec.split("-"))
+    hour = (now or datetime.now()).hour
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+class PrefetchScheduler:
+    """
+    In-process scheduler that keeps the quick-action answers ready in advance.
+    Each job runs on its own interval, outside quiet hours: it runs the full pipeline for
+    its prompt so the answer can be served instantly, or only refreshes the tool data when
+    summaries are disabled. LLM work only starts while no interactive request is in flight,
+    and runs one call at a time, so prefetch never starves users of LLM slots.
+    """
+    def __init__(self, jobs, refresh_tool, generate, is_idle, can_run=None,
+                 summaries=PREFETCH_SUMMARIES, quiet_hours=PREFETCH_QUIET_HOURS):
+        """
+        Args:
+            jobs (list): Job dicts with 'name', 'prompt', 'tool' and 'interval' keys
+                ('google': True for the jobs calling the Google APIs).
+            refresh_tool (coroutine function): refresh_tool(tool_name) refreshes the tool caches.
+            generate (coroutine function): generate(prompt) returns the final answer payload.
+            is_idle (callable): True when no interactive request is using the LLM.
+            can_run (callable, optional): can_run(job) is False when the job must be skipped
+                for now (e.g. Google APIs not authorized yet).
+        """
+        self.jobs = jobs
+        self.refresh_tool = refresh_tool
+        self.generate = generate
+        self.is_idle = is_idle
+        self.can_run = can_run or (lambda job: True)
+        self.summaries = summaries
+        self.quiet_hours = quiet_hours
+        self._answers = {}   # normalized prompt -> {"data", "generated_at", "max_age"}
+        self._next_run = {job["name"]: 0.0 for job in jobs}
+        self._task = None
+        self.stats = {"runs": 0, "served": 0, "postponed": 0, "skipped": 0, "errors": 0}
+
+    @staticmethod
+    def _key(prompt):
+        return " ".join(normalize(prompt))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def _wait_for_idle(self):
+        deadline = time.monotonic() + PREFETCH_IDLE_WAIT
+        while not self.is_idle():
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(1)
+        return True
+
+    async def _run_job(self, job):
+        if not self.summaries:
+            await self.refresh_tool(job["tool"])
+            return
+        if not await self._wait_for_idle():
+            # LLM busy: only the tool data is refreshed, the answer waits for the next run
+            self.stats["postponed"] += 1
+            await self.refresh_tool(job["tool"])
+            return
+        # The pipeline run also refreshes the tool data
+        data = await self.generate(job["prompt"])
+        self._answers[self._key(job["prompt"])] = {
+            "data": data,
+            "generated_at": datetime.now(),
+            "max_age": job["interval"],
+        }
+
+    async def _loop(self):
+        while True:
+            if not in_quiet_hours(self.quiet_hours):
+                for job in self.jobs:
+                    if time.monotonic() < self._next_run[job["name"]]:
+                        continue
+                    self._next_run[job["name"]] = time.monotonic() + job["interval"]
+                    if not self.can_run(job):
+                        self.stats["skipped"] += 1
+                        continue
+                    try:
+                        await self._run_job(job)
+                        self.stats["runs"] += 1
+                    except Exception as e:
+                        self.stats["errors"] += 1
+                        print(f"Prefetch '{job['name']}' failed: {e}")
+            await asyncio.sleep(5)
+
+    def lookup(self, prompt):
+        """
+        Returns the precomputed answer for a prompt, with its freshness, or None when
+        there is none or it is older than the job interval.
+        """
+        entry = self._answers.get(self._key(prompt))
+        if entry is None:
+            return None
+        age = (datetime.now() - entry["generated_at"]).total_seconds()
+        if age > entry["max_age"]:
+            return None
+        self.stats["served"] += 1
+        return dict(
+            entry["data"],
+            freshness={"generated_at": entry["generated_at"].isoformat(timespec="seconds"), "age_s": round(age)}
+        )
@@ -0,0 +1,66 @@
+import os
+
+from .LLMPool import LLM_URLS
+
+# --- MODEL PROFILES ---
+# Chaque agent et chaque synthèse utilise un profil : modèle, serveur(s), longueur maximale
+# de la réponse et séquences d'arrêt. Tout est surchargeable par variables d'environnement :
+#   LLM_PROFILE_<NOM>_MODEL, LLM_PROFILE_<NOM>_URL (liste comme LLM_URL),
+#   LLM_PROFILE_<NOM>_MAX_TOKENS, LLM_PROFILE_<NOM>_STOP (séquences séparées par '|')
+LLM_MODEL = os.getenv("LLM_MODEL", "ministral-3-3b")
+
+class ModelProfile:
+    """Generation settings for one tier of LLM calls."""
+    def __init__(self, name, model=LLM_MODEL, urls=None, max_tokens=None, stop=None, temperature=0):
+        """
+        Args:
+            name (str): Profile name, used in metrics and environment variables.
+            model (str): Model name sent to the server.
+            urls (list, optional): Servers of this tier (defaults to LLM_URL).
+            max_tokens (int, optional): Cap on the generated tokens.
+            stop (list, optional): Stop sequences.
+            temperature (float): Sampling temperature.
+        """
+        self.name = name
+        self.model = model
+        self.urls = urls or LLM_URLS
+        self.max_tokens = max_tokens
+        self.stop = stop
+        self.temperature = temperature
+
+    @classmethod
+    def from_env(cls, name, **defaults):
+        """Builds a profile from its defaults, overridden by LLM_PROFILE_<NAME>_* variables."""
+        prefix = f"LLM_PROFILE_{name.upper()}_"
+        settings = dict(defaults)
+        if os.getenv(prefix + "MODEL"):
+            settings["model"] = os.getenv(prefix + "MODEL")
+        if os.getenv(prefix + "URL"):
+            settings["urls"] = [u.strip() for u in os.getenv(prefix + "URL").split(",") if u.strip()]
+        if os.getenv(prefix + "MAX_TOKENS"):
+            settings["max_tokens"] = int(os.getenv(prefix + "MAX_TOKENS"))
+        if os.getenv(prefix + "STOP") is not None:
+            settings["stop"] = [s for s in os.getenv(prefix + "STOP").split("|") if s] or None
+        return cls(name, **settings)
+
+    def call_kwargs(self):
+        """Per-call overrides applied on top of the server's shared client."""
+        kwargs = {"model": self.model, "temperature": self.temperature}
+        if self.max_tokens:
+            kwargs["max_tokens"] = self.max_tokens
+        if self.stop:
+            kwargs["stop"] = self.stop
+        return kwargs
+
+MODEL_PROFILES = {profile.name: profile for profile in [
+    # Classification en un mot : quelques tokens suffisent
+    ModelProfile.from_env("router", max_tokens=8, stop=["\n"]),
+    # Classification d'un lot : une ligne courte par instruction, BATCH_ROUTER_CHUNK lignes au plus
+    ModelProfile.from_env("router_batch", max_tokens=160),
+    # Appels d'outils des agents spécialisés
+    ModelProfile.from_env("agent", max_tokens=256),
+    # Synthèses courtes (météo, conversation)
+    ModelProfile.from_env("summary", max_tokens=512),
+    # Revue de presse, agenda et emails : la synthèse la plus longue
+    ModelProfile.from_env("briefing", max_tokens=1024),
+]}
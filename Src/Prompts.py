@@ -0,0 +1,160 @@
+import os
+import math
+
+from .Router import normalize
+
+# --- PROMPT BUDGET CONFIGURATION ---
+PROMPT_BUDGET_ENABLED = os.getenv("PROMPT_BUDGET", "1") == "1"
+# Estimation sans tokenizer : ~3.5 caractères par token pour du texte FR/EN
+CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "3.5"))
+
+# Budget de tokens du prompt de synthèse, par catégorie d'agent
+PROMPT_BUDGETS = {
+    "weather": int(os.getenv("PROMPT_BUDGET_WEATHER", "300")),
+    "personal": int(os.getenv("PROMPT_BUDGET_PERSONAL", "900")),
+    "news": int(os.getenv("PROMPT_BUDGET_NEWS", "700")),
+    "general": int(os.getenv("PROMPT_BUDGET_GENERAL", "1500")),
+}
+
+# Two headlines sharing this share of their words are the same story
+DUPLICATE_SIMILARITY = 0.6
+EMAIL_SNIPPET_CHARS = int(os.getenv("PROMPT_EMAIL_SNIPPET_CHARS", "160"))
+
+def estimate_tokens(text):
+    """Cheap token count estimate, good enough to enforce a budget."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def shorten(text, max_chars):
+    """Cuts the text on a word boundary, marking the cut with an ellipsis."""
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0].rstrip(" ,;:.") + "…"
+
+def similarity(a, b):
+    """Jaccard similarity of two word sets."""
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+# --- ITEM RANKING ---
+# Tool results are one item per line (an optional 'Title:' line first). Each ranker
+# returns the items in the order they should survive trimming.
+
+def parse_headline(line):
+    """
+    Splits a news line '[FEED_A, FEED_B] NEW : title' into (feeds, new, title).
+    Lines of another shape come back as ([], False, line).
+    """
+    prefix, sep, title = line.partition(" : ")
+    if not sep or not prefix.startswith("[") or "]" not in prefix:
+        return [], False, line
+    sources, _, flag = prefix[1:].partition("]")
+    return [s.strip() for s in sources.split(",") if s.strip()], flag.strip() == "NEW", title
+
+def new_headlines(text):
+    """Titles of the stories flagged NEW in a text (tool result or summary prompt)."""
+    titles = []
+    for line in text.splitlines():
+        _, new, title = parse_headline(line.strip())
+        if new:
+            titles.append(title)
+    return titles
+
+def without_new_flags(text):
+    """
+    The text with the NEW flags of its news lines removed. Used as the LLM cache key,
+    since the flags disappear as soon as an answer citing the stories is delivered.
+    """
+    lines = []
+    for line in text.split("\n"):
+        feeds, new, title = parse_headline(line.strip())
+        lines.append(f"[{', '.join(feeds)}] : {title}" if new else line)
+    return "\n".join(lines)
+
+def rank_headlines(lines):
+    """
+    Drops near-duplicate stories, then interleaves the sources so a tight budget
+    still covers every outlet rather than the first feed's whole front page.
+    Stories already clustered by the headline store (several outlets or a NEW flag)
+    keep the store's order: new stories first, then the most covered.
+    """
+    parsed = [parse_headline(line) for line in lines]
+    clustered = any(new or len(feeds) > 1 for feeds, new, _ in parsed)
+    seen, by_source = [], {}
+    for line, (feeds, _, title) in zip(lines, parsed):
+        words = set(normalize(title))
+        if any(similarity(words, other) >= DUPLICATE_SIMILARITY for other in seen):
+            continue
+        seen.append(words)
+        by_source.setdefault(None if clustered else tuple(feeds), []).append(line)
+    queues = list(by_source.values())
+    depth = max((len(q) for q in queues), default=0)
+    return [q[i] for i in range(depth) for q in queues if i < len(q)]
+
+def rank_emails(lines):
+    """Emails come newest first: keeps that order, shortens snippets and drops repeats."""
+    ranked, seen = [], set()
+    for line in lines:
+        subject, sep, snippet = line.partition(" | Snippet: ")
+        if subject in seen:
+            continue
+        seen.add(subject)
+        ranked.append(subject + sep + shorten(snippet.rstrip("]"), EMAIL_SNIPPET_CHARS) + ("]" if sep else ""))
+    return ranked
+
+ITEM_RANKERS = {
+    "compile_news_reports": rank_headlines,
+    "summarize_recent_emails": rank_emails,
+}
+
+def split_items(text):
+    """Returns (title line or '', item lines) for a tool result."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) > 1 and lines[0].endswith(":"):
+        return lines[0], lines[1:]
+    return "", lines
+
+# --- PROMPT ASSEMBLY ---
+
+def build_budgeted_prompt(header, sections, footer, category="general", enabled=PROMPT_BUDGET_ENABLED):
+    """
+    Assembles a summary prompt that fits the category's token budget.
+    The header and footer are always kept whole; the budget left over is shared among
+    the sections in order, each taking its ranked items while they fit and handing
+    what it does not use to the next ones.
+
+    Args:
+        header (str): Stable prefix (kept first so the LLM server can reuse its KV cache).
+        sections (list): (tool_name, template, data) tuples, in priority order.
+        footer (str): The user request.
+        category (str): Budget key in PROMPT_BUDGETS.
+        enabled (bool): When False the raw data is pasted as is.
+    Returns:
+        tuple: (prompt, estimated tokens before trimming, estimated tokens after).
+    """
+    raw = "\n\n".join([header] + [template.format(data=data) for _, template, data in sections] + [footer])
+    if not enabled:
+        return raw, estimate_tokens(raw), estimate_tokens(raw)
+
+    remaining = PROMPT_BUDGETS.get(category, PROMPT_BUDGETS["general"]) - estimate_tokens(header + footer)
+    parts = [header]
+    for index, (tool_name, template, data) in enumerate(sections):
+        share = max(remaining // (len(sections) - index), 0)
+        title, items = split_items(str(data))
+        items = ITEM_RANKERS.get(tool_name, list)(items)
+        kept = []
+        used = estimate_tokens(template.format(data=title))
+        for item in items:
+            cost = estimate_tokens(item) + 1
+            if used + cost > share:
+                if not kept:
+                    # A single oversized item (raw JSON, long error...) is cut rather than dropped
+                    kept.append(shorten(item, max(int((share - used) * CHARS_PER_TOKEN), 0)))
+                    used = share
+                break
+            kept.append(item)
+            used += cost
+        remaining -= used
+        body = "\n".join(([title] if title else []) + kept)
+        parts.append(template.format(data=body))
+    parts.append(footer)
+    prompt = "\n\n".join(parts)
+    return prompt, estimate_tokens(raw), estimate_tokens(prompt)
@@ -0,0 +1,107 @@
+import re
+import unicodedata
+
+# --- FAST-PATH INTENT CLASSIFIER ---
+# Deterministic keyword/phrase matching placed in front of the LLM router.
+# Only high-confidence requests are routed locally; everything else still goes to the LLM.
+
+# Phrases are matched on normalized tokens (lowercase, no accents). Weight 2 = decisive, 1 = hint.
+INTENT_PHRASES = {
+    "PERSONAL_AGENT": {
+        2: [
+            "actualite", "actualites", "actu", "actus", "news", "presse", "revue de presse",
+            "journal", "journaux", "headlines", "gros titres", "une des journaux",
+            "calendrier", "calendar", "agenda", "rendez vous", "rdv", "reunion", "reunions",
+            "meeting", "meetings", "schedule", "planning", "emploi du temps",
+            "email", "emails", "e mail", "e mails", "mail", "mails", "courriel", "courriels",
+            "gmail", "inbox", "boite de reception", "boite mail", "nouveaux messages",
+        ],
+        1: ["info", "infos", "compilation", "evenement", "evenements", "messages", "briefing", "senat"],
+    },
+    "WEATHER_AGENT": {
+        2: [
+            "meteo", "weather", "temperature", "temperatures", "quel temps", "fait il beau",
+            "forecast", "previsions", "pluie", "pleut", "pleuvoir", "rain", "raining", "neige",
+            "neiger", "snow", "parapluie", "umbrella", "climat", "canicule", "orage", "orages",
+        ],
+        1: ["soleil", "sunny", "vent", "wind", "chaud", "froid", "degres", "hot", "cold"],
+    },
+    "DOMO_AGENT": {
+        2: [
+            "lumiere", "lumieres", "lampe", "lampes", "light", "lights", "lamp", "lamps",
+            "allume", "allumer", "allumes", "eteins", "eteindre", "eteint", "eclairage",
+            "turn on", "turn off", "switch on", "switch off", "hue", "je suis rentre",
+            "je suis rentree", "je pars", "mode nuit", "volets", "chauffage",
+        ],
+        1: ["salon", "chambre", "living room", "bedroom", "cuisine", "kitchen"],
+    },
+    "GENERAL": {
+        2: ["blague", "joke", "qui es tu", "who are you", "traduis", "translate", "raconte moi une histoire"],
+        1: ["bonjour", "hello", "merci", "thanks"],
+    },
+}
+
+# A local decision needs at least this score, and must beat the runner-up by this factor
+MIN_SCORE = 2
+MIN_MARGIN = 2.0
+
+def normalize(text):
+    """Lowercases, strips accents and splits the text into word tokens."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"[a-z0-9]+", text)
+
+def _build_trie():
+    """Builds a token trie: each node maps a token to its child, '$' holds (label, weight)."""
+    root = {}
+    for label, weighted in INTENT_PHRASES.items():
+        for weight, phrases in weighted.items():
+            for phrase in phrases:
+                node = root
+                for token in normalize(phrase):
+                    node = node.setdefault(token, {})
+                node.setdefault("$", []).append((label, weight))
+    return root
+
+_TRIE = _build_trie()
+
+def score_intents(text):
+    """
+    Scores every intent by the phrases found in the text.
+    Each distinct phrase counts once, so repeating a word does not inflate the score.
+
+    Returns:
+        dict: intent label -> score.
+    """
+    tokens = normalize(text)
+    matched = set()
+    for start in range(len(tokens)):
+        node = _TRIE
+        for end in range(start, len(tokens)):
+            node = node.get(tokens[end])
+            if node is None:
+                break
+            for label, weight in node.get("$", []):
+                matched.add((" ".join(tokens[start:end + 1]), label, weight))
+
+    scores = {label: 0 for label in INTENT_PHRASES}
+    for _, label, weight in matched:
+        scores[label] += weight
+    return scores
+
+def classify_intent(text):
+    """
+    Routes a request locally when the decision is unambiguous.
+
+    Args:
+        text (str): The raw user instruction.
+    Returns:
+        tuple: (label, confidence) where label is one of the router categories,
+        or (None, confidence) when the LLM router must decide.
+    """
+    ranked = sorted(score_intents(text).items(), key=lambda item: item[1], reverse=True)
+    (best, top), (_, second) = ranked[0], ranked[1]
+    confidence = round(top / (top + second), 2) if top else 0.0
+    if top >= MIN_SCORE and top >= MIN_MARGIN * second:
+        return best, confidence
+    return None, confidence
@@ -1,23 +1,20 @@
-import requests
 import json
 import os.path
 import imaplib
 import email
-import feedparser # pyright: ignore[reportMissingImports]
 from email.header import decode_header
 from datetime import datetime
 from langchain_core.tools import tool
 
-# Google API Libraries
-from google.auth.transport.requests import Request # pyright: ignore[reportMissingImports]
-from google.oauth2.credentials import Credentials # pyright: ignore[reportMissingImports] 
-from google_auth_oauthlib.flow import InstalledAppFlow # pyright: ignore[reportMissingImports]
-from googleapiclient.discovery import build # pyright: ignore[reportMissingImports]
-
-# Local hardware bridge import
-# In production, 'bridge' replaces the French 'pont'
-
-from .Domotics import Bridge_hue # pyright: ignore[reportMissingImports]
+# Local hardware bridge import (connects lazily, in the background)
+from .Domotics import hue # pyright: ignore[reportMissingImports]
+from .Feeds import feed_fetcher
+from .Headlines import headline_store
+from .GoogleAuth import google_services
+from .Gmail import gmail_mailbox, GMAIL_MAX_RESULTS
+from .Cache import TTLCache
+from .Network import get_session, HTTP_TIMEOUT
+from .Metrics import span, TOOL_STEP_LATENCY
 
 # --- NEWS SERVICES CONFIGURATION ---
 # Anonymized dictionary of RSS feeds
@@ -31,59 +28,53 @@ NEWS_FEEDS = {
     "INSTITUTIONAL_SENATE": "https://www.senat.fr/rss/rapports.xml"
 }
 
-# --- GOOGLE AUTH CONFIGURATION ---
-SCOPES = [
-    'https://www.googleapis.com/auth/calendar.readonly', 
-    'https://www.googleapis.com/auth/gmail.readonly'
-]
-
-def get_google_service(service_name, version):
-    """Anonymized helper to handle Google OAuth2 authentication."""
-    creds = None
-    # Token and credentials files should be in .gitignore
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
-            
-    return build(service_name, version, credentials=creds)
+# Nombre de sujets renvoyés et fenêtre par défaut de la revue de presse (heures)
+NEWS_MAX_STORIES = int(os.getenv("NEWS_MAX_STORIES", "12"))
+NEWS_WINDOW_HOURS = float(os.getenv("NEWS_WINDOW_HOURS", "24"))
 
 # --- NEWS TOOLS ---
 
 @tool
-def compile_news_reports(sources: list = None):
+def compile_news_reports(sources: list = None, since_hours: int = None, query: str = None):
     """
     Fetches and aggregates news headlines from multiple RSS feeds.
     If no sources are provided, defaults to a standard selection.
+    The same story told by several outlets is listed once; stories not reported yet are marked NEW.
+    Use 'since_hours' for "what did I miss" requests (e.g. 24 since yesterday) and 'query'
+    to search past headlines by keywords.
     """
     if not sources or not isinstance(sources, list) or len(sources) == 0:
         sources = ["PUBLIC_SERVICE_POLITICS", "MAIN_STREAM_1_POLITICS", "MAIN_STREAM_2_POLITICS"]
     
     compilation = []
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-
+    feeds = {}
     for key in sources:
         if not key or not isinstance(key, str): continue
         url = NEWS_FEEDS.get(key.upper())
         if not url: continue
-        
-        try:
-            # agent=headers mimics a browser to bypass institutional bot filters
-            feed = feedparser.parse(url, agent=headers["User-Agent"])
-            
-            if feed.entries:
-                for entry in feed.entries[:3]: 
-                    title = entry.title.replace('\n', ' ').strip()
-                    compilation.append(f"[{key.upper()}] : {title}")
-        except Exception as e:
-            print(f"Error scanning {key}: {e}")
+        feeds[key.upper()] = url
+
+    # Parallel fetch, served from the per-feed cache when fresh
+    with span(TOOL_STEP_LATENCY, tool="compile_news_reports", step="fetch_feeds"):
+        fetched = feed_fetcher.fetch_many(feeds)
+
+    # New headlines go to the archive; stories are then read back clustered and ranked
+    try:
+        with span(TOOL_STEP_LATENCY, tool="compile_news_reports", step="headline_store"):
+            for key, entries in fetched.items():
+                headline_store.add(key, entries)
+            if query:
+                for match in headline_store.search(query, limit=NEWS_MAX_STORIES):
+                    compilation.append(f"[{match['feed']}] : {match['title']}")
+            else:
+                window = since_hours if isinstance(since_hours, (int, float)) and since_hours > 0 else NEWS_WINDOW_HOURS
+                for story in headline_store.stories(list(feeds), window, NEWS_MAX_STORIES):
+                    compilation.append(f"[{', '.join(story['feeds'])}]{' NEW' if story['new'] else ''} : {story['title']}")
+    except Exception as e:
+        print(f"Headline store unavailable ({e}), using the raw feeds")
+        for key, entries in fetched.items():
+            for entry in entries[:3]:
+                compilation.append(f"[{key}] : {entry['title']}")
             
     if not compilation:
         return "ERROR: No news headlines could be retrieved from the selected feeds."
@@ -96,45 +87,46 @@ def compile_news_reports(sources: list = None):
 def get_daily_calendar():
     """Retrieves today's calendar events from the primary Google Calendar."""
     try:
-        service = get_google_service('calendar', 'v3')
         now = datetime.utcnow().isoformat() + 'Z'
-        events_result = service.events().list(
-            calendarId='primary', timeMin=now,
-            maxResults=10, singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        with span(TOOL_STEP_LATENCY, tool="get_daily_calendar", step="events_list"), \
+                google_services.client('calendar', 'v3') as service:
+            events_result = service.events().list(
+                calendarId='primary', timeMin=now,
+                maxResults=10, singleEvents=True,
+                orderBy='startTime'
+            ).execute()
         events = events_result.get('items', [])
         
         if not events:
             return "No events found for today."
         
-        summary = "Today's Schedule: "
+        # One event per line so the prompt builder can trim them individually
+        summary = ["Today's Schedule:"]
         for event in events:
             start = event['start'].get('dateTime', event['start'].get('date'))
-            summary += f"- {event['summary']} at {start} "
-        return summary
+            summary.append(f"- {event['summary']} at {start}")
+        return "\n".join(summary)
     except Exception as e:
         return f"Calendar Error: {str(e)}"
 
 @tool
-def summarize_recent_emails():
-    """Fetches and summarizes the last 5 emails from the Gmail inbox."""
+def summarize_recent_emails(max_results: int = None):
+    """Fetches and summarizes the most recent emails from the Gmail inbox (default: 5)."""
     try:
-        service = get_google_service('gmail', 'v1')
-        results = service.users().messages().list(userId='me', labelIds=['INBOX'], maxResults=5).execute()
-        messages = results.get('messages', [])
+        count = max_results if isinstance(max_results, int) and max_results > 0 else GMAIL_MAX_RESULTS
+        with span(TOOL_STEP_LATENCY, tool="summarize_recent_emails", step="gmail_sync"), \
+                google_services.client('gmail', 'v1') as service:
+            # Batched metadata fetch, incremental since the last sync
+            messages = gmail_mailbox.recent(service, count)
         
         if not messages:
             return "No new emails found."
         
-        summaries = "Recent Emails: "
-        for msg in messages:
-            m = service.users().messages().get(userId='me', id=msg['id']).execute()
-            snippet = m['snippet']
-            headers = m['payload']['headers']
-            subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), "No Subject")
-            summaries += f" [Subject: {subject} | Snippet: {snippet}] "
-        return summaries
+        # One email per line, newest first
+        summaries = ["Recent Emails:"]
+        for m in messages:
+            summaries.append(f"[Subject: {' '.join(m['subject'].split())} | Snippet: {' '.join(m['snippet'].split())}]")
+        return "\n".join(summaries)
     except Exception as e:
         return f"Gmail Error: {str(e)}"
 
@@ -142,14 +134,24 @@ def summarize_recent_emails():
 
 @tool
 def control_lights(location: str, action: str):
-    """Controls smart lights. Location: 'LIVING_ROOM' or 'BEDROOM'. Action: 'ON' or 'OFF'."""
-    # Mapping anonymized locations to hardware IDs
-    light_id = 'Hue color lamp 1' if location.upper() == "LIVING_ROOM" else 'Hue color lamp 2'
-    bridge.set_light(light_id, 'on', (action.upper() == "ON"))
-    return f"{location} light set to {action}."
+    """Controls smart lights. Location: 'LIVING_ROOM', 'BEDROOM' or 'ALL' (every light). Action: 'ON' or 'OFF'."""
+    # Lamps already in the requested state are skipped, 'ALL' is a single group call
+    with span(TOOL_STEP_LATENCY, tool="control_lights", step="hue_command"):
+        return hue.switch(location, action.upper() == "ON")
 
 # --- WEATHER TOOLS ---
 
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# City coordinates never change: bounded LRU, optionally persisted across restarts
+geocode_cache = TTLCache(
+    maxsize=int(os.getenv("GEOCODE_CACHE_SIZE", "256")),
+    path=os.getenv("GEOCODE_CACHE_FILE") or None
+)
+# Forecasts change hourly at most; keyed on coordinates rounded to ~1 km
+forecast_cache = TTLCache(maxsize=64, ttl=int(os.getenv("FORECAST_CACHE_TTL", "900")))
+
 @tool
 def get_weather_forecast(location: str = None):
     """
@@ -157,32 +159,55 @@ def get_weather_forecast(location: str = None):
     If a location (city name) is provided, it fetches weather for that city.
     Otherwise, it uses the default home coordinates.
     """
+    session = get_session()
+
     # 1. Déterminer les coordonnées
     if location and location.strip():
-        # Géocodage : Traduire le nom de la ville en coordonnées
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location}&count=1&language=fr&format=json"
-        try:
-            geo_res = requests.get(geo_url).json()
-            if "results" in geo_res:
-                lat = geo_res["results"][0]["latitude"]
-                lon = geo_res["results"][0]["longitude"]
-                city_name = geo_res["results"][0]["name"]
-            else:
-                return f"Désolé, je ne trouve pas la ville de {location}."
-        except Exception as e:
-            return f"Erreur de géocodage : {str(e)}"
+        # Géocodage : Traduire le nom de la ville en coordonnées (mis en cache)
+        city_key = location.strip().lower()
+        place = geocode_cache.get(city_key)
+        if place is None:
+            try:
+                with span(TOOL_STEP_LATENCY, tool="get_weather_forecast", step="geocode"):
+                    geo_res = session.get(
+                        GEOCODING_URL,
+                        params={"name": location.strip(), "count": 1, "language": "fr", "format": "json"},
+                        timeout=HTTP_TIMEOUT
+                    ).json()
+                if "results" not in geo_res:
+                    return f"Désolé, je ne trouve pas la ville de {location}."
+                first = geo_res["results"][0]
+                place = {"lat": first["latitude"], "lon": first["longitude"], "name": first["name"]}
+                geocode_cache.set(city_key, place)
+            except Exception as e:
+                return f"Erreur de géocodage : {str(e)}"
+        lat, lon, city_name = place["lat"], place["lon"], place["name"]
     else:
         # Par défaut : Coordonnées du domicile (.env)
         lat = os.getenv("HOME_LAT", "45.1839")
         lon = os.getenv("HOME_LON", "5.7089")
         city_name = "votre domicile"
 
-    # 2. Appel de l'API Météo avec les coordonnées trouvées
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&daily=temperature_2m_max,temperature_2m_min&timezone=auto"
+    # 2. Appel de l'API Météo avec les coordonnées trouvées (sauf si déjà en cache)
+    forecast_key = (round(float(lat), 2), round(float(lon), 2))
+    data = forecast_cache.get(forecast_key)
     
     try:
-        response = requests.get(url)
-        data = response.json()
+        if data is None:
+            with span(TOOL_STEP_LATENCY, tool="get_weather_forecast", step="forecast"):
+                response = session.get(
+                    FORECAST_URL,
+                    params={
+                        "latitude": forecast_key[0], "longitude": forecast_key[1],
+                        "current_weather": "true",
+                        "daily": "temperature_2m_max,temperature_2m_min",
+                        "timezone": "auto"
+                    },
+                    timeout=HTTP_TIMEOUT
+                )
+            response.raise_for_status()
+            data = response.json()
+            forecast_cache.set(forecast_key, data)
         result = {
             "location_found": city_name,
             "current": data['current_weather']['temperature'],
@@ -192,4 +217,4 @@ def get_weather_forecast(location: str = None):
         }
         return json.dumps(result)
     except Exception as e:
-        return f"Weather Service Error: {str(e)}"
\ No newline at end of file
+        return f"Weather Service Error: {str(e)}"